@@ -34,4 +34,121 @@ CREATE TABLE IF NOT EXISTS execution_audit (
 );
 
 -- Convert to a TimescaleDB Hypertable
-SELECT create_hypertable('execution_audit', 'time', if_not_exists => TRUE);
\ No newline at end of file
+SELECT create_hypertable('execution_audit', 'time', if_not_exists => TRUE);
+
+-- ==========================================
+-- 3. Precomputed RAG Macro Clearance
+-- ==========================================
+-- One verdict per vault content version, written at ingest time and
+-- announced on the 'vault_clearance' NOTIFY channel.
+CREATE TABLE IF NOT EXISTS vault_clearance (
+    collection_name TEXT NOT NULL,
+    collection_version TEXT NOT NULL,
+    is_clear BOOLEAN NOT NULL,
+    reasoning TEXT,
+    chunk_count INTEGER,
+    computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (collection_name, collection_version)
+);
+
+-- ==========================================
+-- 4. Quote Storage Policy & OHLCV Aggregates
+-- ==========================================
+-- Mirrors services/market_data/ohlcv.py (applied idempotently by the market writer
+-- on start, for volumes created before this section existed).
+SELECT create_hypertable('market_candles', 'time', if_not_exists => TRUE);
+
+SELECT set_chunk_time_interval('market_candles', INTERVAL '1 day');
+
+DO $$ BEGIN
+    IF NOT EXISTS (SELECT 1 FROM timescaledb_information.hypertables
+                   WHERE hypertable_name = 'market_candles' AND compression_enabled) THEN
+        ALTER TABLE market_candles SET (timescaledb.compress,
+            timescaledb.compress_segmentby = 'symbol', timescaledb.compress_orderby = 'time DESC');
+    END IF;
+END $$;
+
+SELECT add_compression_policy('market_candles', INTERVAL '1 day', if_not_exists => TRUE);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_bars_1m
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket('1 minute', time) AS bucket, symbol,
+       first(price, time) AS open, max(price) AS high, min(price) AS low,
+       last(price, time) AS close, sum(volume) AS volume, count(*) AS ticks
+FROM market_candles
+GROUP BY bucket, symbol
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_bars_5m
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket('5 minutes', bucket) AS bucket, symbol,
+       first(open, bucket) AS open, max(high) AS high, min(low) AS low,
+       last(close, bucket) AS close, sum(volume) AS volume, sum(ticks) AS ticks
+FROM market_bars_1m
+GROUP BY 1, symbol
+WITH NO DATA;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS market_bars_1h
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT time_bucket('1 hour', bucket) AS bucket, symbol,
+       first(open, bucket) AS open, max(high) AS high, min(low) AS low,
+       last(close, bucket) AS close, sum(volume) AS volume, sum(ticks) AS ticks
+FROM market_bars_5m
+GROUP BY 1, symbol
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('market_bars_1m', start_offset => INTERVAL '1 hour',
+        end_offset => INTERVAL '1 minute', schedule_interval => INTERVAL '1 minute', if_not_exists => TRUE);
+
+SELECT add_continuous_aggregate_policy('market_bars_5m', start_offset => INTERVAL '6 hours',
+        end_offset => INTERVAL '5 minutes', schedule_interval => INTERVAL '5 minutes', if_not_exists => TRUE);
+
+SELECT add_continuous_aggregate_policy('market_bars_1h', start_offset => INTERVAL '3 days',
+        end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '30 minutes', if_not_exists => TRUE);
+
+DO $$
+DECLARE v TEXT;
+BEGIN
+    FOREACH v IN ARRAY ARRAY['market_bars_1m', 'market_bars_5m', 'market_bars_1h'] LOOP
+        IF NOT EXISTS (SELECT 1 FROM timescaledb_information.continuous_aggregates
+                       WHERE view_name = v AND compression_enabled) THEN
+            EXECUTE format('ALTER MATERIALIZED VIEW %I SET (timescaledb.compress = true)', v);
+        END IF;
+    END LOOP;
+END $$;
+
+SELECT add_compression_policy('market_bars_1m', compress_after => INTERVAL '7 days', if_not_exists => TRUE);
+
+SELECT add_compression_policy('market_bars_5m', compress_after => INTERVAL '30 days', if_not_exists => TRUE);
+
+SELECT add_compression_policy('market_bars_1h', compress_after => INTERVAL '90 days', if_not_exists => TRUE);
+
+SELECT add_retention_policy('market_candles', INTERVAL '30 days', if_not_exists => TRUE);
+
+SELECT add_retention_policy('market_bars_1m', INTERVAL '180 days', if_not_exists => TRUE);
+
+SELECT add_retention_policy('market_bars_5m', INTERVAL '2 years', if_not_exists => TRUE);
+
+-- ==========================================
+-- 5. Engine Control Channel
+-- ==========================================
+-- Sequenced dashboard commands. The trigger NOTIFYs 'apex_control' on commit;
+-- the engine applies rows in seq order and acks them in place.
+CREATE TABLE IF NOT EXISTS apex_commands (
+    seq BIGSERIAL PRIMARY KEY,
+    command TEXT NOT NULL CHECK (command IN ('START', 'STOP', 'LIQUIDATE')),
+    issued_by TEXT,
+    issued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    acked_at TIMESTAMPTZ,
+    ack_status TEXT,
+    ack_detail TEXT
+);
+CREATE OR REPLACE FUNCTION notify_apex_command() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('apex_control', NEW.seq::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+DROP TRIGGER IF EXISTS apex_commands_notify ON apex_commands;
+CREATE TRIGGER apex_commands_notify AFTER INSERT ON apex_commands
+    FOR EACH ROW EXECUTE FUNCTION notify_apex_command();
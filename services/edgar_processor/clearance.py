@@ -0,0 +1,135 @@
+import os
+import argparse
+import psycopg2
+from dotenv import load_dotenv
+from langchain_groq import ChatGroq
+
+load_dotenv()
+
+# --- ARCHITECTURE SETUP ---
+DB_PASS = os.getenv("DB_PASSWORD", "secretpassword")
+DB_HOST = os.getenv("DB_HOST", "sentient_db")
+COLLECTION_NAME = "institutional_research"
+NOTIFY_CHANNEL = "vault_clearance"
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS vault_clearance (
+        collection_name TEXT NOT NULL,
+        collection_version TEXT NOT NULL,
+        is_clear BOOLEAN NOT NULL,
+        reasoning TEXT,
+        chunk_count INTEGER,
+        computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (collection_name, collection_version)
+    );
+"""
+
+# The version is a content fingerprint: it changes iff the collection's chunks change
+VERSION_SQL = """
+    SELECT md5(string_agg(md5(e.document), '' ORDER BY md5(e.document))), count(*)
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = %s;
+"""
+
+CONTEXT_SQL = """
+    SELECT e.document
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = %s
+    LIMIT 10;
+"""
+
+# Retrieval query for the risk officer's context (the old live vault check's question)
+RISK_QUERY = "liquidation risk, margin calls, debt covenants and Bitcoin impairment"
+CONTEXT_K = 10
+
+def get_connection():
+    return psycopg2.connect(host=DB_HOST, database="sentient_alpha", user="admin", password=DB_PASS)
+
+def retrieve_context(cur, collection_name):
+    """
+    Top chunks for RISK_QUERY from the memory-mapped local index (synced
+    incrementally first). Falls back to an unranked sample if the embedding
+    server or the index is unavailable.
+    """
+    try:
+        from local_index import LocalVectorIndex
+        from embedding_client import get_embeddings
+        index = LocalVectorIndex(collection_name)
+        index.rebuild()
+        hits = index.search(get_embeddings().embed_query(RISK_QUERY), k=CONTEXT_K)
+        return "\n".join(row["document"] for row, _ in hits)
+    except Exception as e:
+        print(f"⚠️ [CLEARANCE] Local index unavailable ({e}). Using unranked context.")
+        cur.execute(CONTEXT_SQL, (collection_name,))
+        return "\n".join(rec[0] for rec in cur.fetchall())
+
+def ask_risk_officer(context):
+    """Groq 70B verdict on the filing context. Same prompt the trade path used to send live."""
+    llm = ChatGroq(temperature=0, model_name="llama-3.3-70b-versatile", groq_api_key=os.getenv("GROQ_API_KEY"))
+    prompt = (
+        f"SYSTEM: Senior FinTech Risk Officer.\n"
+        f"CONTEXT (MSTR 10-K): {context[:3000]}\n"
+        f"TASK: Based ONLY on this SEC filing context, is there an immediate liquidation risk or catastrophic debt failure for Bitcoin? "
+        f"Reply exactly with 'CLEAR' if safe, or 'BLOCK' if dangerous. Add one sentence of reasoning."
+    )
+    response = llm.invoke(prompt).content.strip().upper()
+    return "CLEAR" in response, response
+
+def refresh_clearance(collection_name=COLLECTION_NAME, force=False):
+    """
+    Computes the CLEAR/BLOCK verdict for the current collection version and
+    publishes it on the vault_clearance channel. A version that already has a
+    verdict skips the LLM call and is only re-announced.
+    """
+    conn = get_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(SCHEMA_SQL)
+            cur.execute(VERSION_SQL, (collection_name,))
+            version, chunk_count = cur.fetchone()
+            if not chunk_count:
+                print(f"⚠️ [CLEARANCE] Collection '{collection_name}' is empty. Nothing to evaluate.")
+                return None
+
+            cur.execute(
+                "SELECT is_clear, reasoning FROM vault_clearance WHERE collection_name = %s AND collection_version = %s;",
+                (collection_name, version),
+            )
+            existing = cur.fetchone()
+            if existing and not force:
+                # The vault may have returned to an earlier version: engines re-select by version on NOTIFY
+                cur.execute("SELECT pg_notify(%s, %s);", (NOTIFY_CHANNEL, collection_name))
+                print(f"✅ [CLEARANCE] Version {version[:8]} already evaluated: {'CLEAR' if existing[0] else 'BLOCK'}")
+                return existing
+
+            context = retrieve_context(cur, collection_name)
+
+        print(f"🧠 [CLEARANCE] Evaluating version {version[:8]} ({chunk_count} chunks) with Groq 70B...")
+        is_clear, reasoning = ask_risk_officer(context)
+
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO vault_clearance (collection_name, collection_version, is_clear, reasoning, chunk_count)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (collection_name, collection_version)
+                DO UPDATE SET is_clear = EXCLUDED.is_clear, reasoning = EXCLUDED.reasoning, computed_at = NOW();
+                """,
+                (collection_name, version, is_clear, reasoning, chunk_count),
+            )
+            # Wakes every trading engine listening on the channel
+            cur.execute("SELECT pg_notify(%s, %s);", (NOTIFY_CHANNEL, collection_name))
+
+        print(f"🔏 [CLEARANCE] Published {'CLEAR' if is_clear else 'BLOCK'} for version {version[:8]}.")
+        return is_clear, reasoning
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the RAG macro clearance verdict")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--force", action="store_true", help="Re-evaluate even if this version has a verdict")
+    args = parser.parse_args()
+    refresh_clearance(args.collection, force=args.force)
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- CONCURRENT EDGAR FETCHER ---
+# Pulls the latest filings for a list of CIKs over one pooled session.
+# Every response is kept on disk with its ETag/Last-Modified, and later runs
+# revalidate with a conditional GET, so an unchanged filing costs one 304.
+# Requests are paced per host to stay under SEC's 10 req/s fair-access cap.
+USER_AGENT = "RiverFlowQuant/1.0 (admin@riverflow.com) ResearchBot/2.0"
+CACHE_DIR = os.getenv("EDGAR_CACHE_DIR", "/app/data/edgar_cache")
+MAX_RATE = 8.0      # Requests per second per host (SEC allows 10)
+MAX_WORKERS = 8
+SUBMISSIONS_URL = "https://data.sec.gov/submissions/CIK{cik:010d}.json"
+ARCHIVE_URL = "https://www.sec.gov/Archives/edgar/data/{cik}/{accession}/{document}"
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads."""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class EdgarFetcher:
+    def __init__(self, cache_dir=CACHE_DIR, rate=MAX_RATE, workers=MAX_WORKERS):
+        self.cache_dir = cache_dir
+        self.rate = rate
+        self.workers = workers
+        self.limiters = {}
+        self.limiters_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+        # Backs off on SEC throttling (429) and transient 5xx, honouring Retry-After
+        retry = Retry(total=4, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=retry)
+        self.session.mount("https://", adapter)
+
+    def _limiter(self, host):
+        with self.limiters_lock:
+            if host not in self.limiters:
+                self.limiters[host] = RateLimiter(self.rate)
+            return self.limiters[host]
+
+    def _cache_paths(self, url):
+        host = urlparse(url).netloc
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, host, key)
+        return base + ".body", base + ".meta.json"
+
+    def get(self, url, timeout=30):
+        """
+        Conditional GET through the disk cache -> (body bytes, changed).
+        changed is False when the server answered 304 Not Modified.
+        """
+        body_path, meta_path = self._cache_paths(url)
+        headers = {}
+        if os.path.exists(body_path) and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        self._limiter(urlparse(url).netloc).wait()
+        res = self.session.get(url, headers=headers, timeout=timeout)
+        if res.status_code == 304:
+            with open(body_path, "rb") as f:
+                return f.read(), False
+        res.raise_for_status()
+
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        # Body first, then metadata: a crash in between only costs a full re-download
+        for path, payload in (
+            (body_path, res.content),
+            (meta_path, json.dumps({"url": url, "etag": res.headers.get("ETag"),
+                                    "last_modified": res.headers.get("Last-Modified"),
+                                    "fetched_at": time.time()}).encode("utf-8")),
+        ):
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        return res.content, True
+
+    def latest_filings(self, cik, forms=("10-K",), per_form=1):
+        """Newest `per_form` filings of each form type from the CIK's submissions index."""
+        body, _ = self.get(SUBMISSIONS_URL.format(cik=int(cik)))
+        index = json.loads(body)
+        recent = index["filings"]["recent"]
+        ticker = (index.get("tickers") or [str(int(cik))])[0]
+        filings, counts = [], {form: 0 for form in forms}
+        # The "recent" arrays are ordered newest first
+        for form, accession, filed, document in zip(
+            recent["form"], recent["accessionNumber"], recent["filingDate"], recent["primaryDocument"]
+        ):
+            if form in counts and counts[form] < per_form and document:
+                counts[form] += 1
+                filings.append({
+                    "cik": int(cik), "ticker": ticker, "form": form, "accession": accession, "filed": filed,
+                    "url": ARCHIVE_URL.format(cik=int(cik), accession=accession.replace("-", ""), document=document),
+                })
+        return filings
+
+    def fetch(self, ciks, forms=("10-K",), per_form=1):
+        """
+        Resolves and downloads filings for every CIK concurrently. Returns the
+        filing dicts with `content` and `changed` added; failures are reported
+        and skipped so one issuer cannot sink the batch.
+        """
+        filings = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="edgar") as pool:
+            lookups = {pool.submit(self.latest_filings, cik, forms, per_form): cik for cik in ciks}
+            for future in as_completed(lookups):
+                try:
+                    filings.extend(future.result())
+                except Exception as e:
+                    print(f"⚠️ [EDGAR] Submissions lookup failed for CIK {lookups[future]}: {e}")
+
+            downloads = {pool.submit(self.get, filing["url"]): filing for filing in filings}
+            results = []
+            for future in as_completed(downloads):
+                filing = downloads[future]
+                try:
+                    filing["content"], filing["changed"] = future.result()
+                    results.append(filing)
+                    state = "updated" if filing["changed"] else "unchanged (304)"
+                    print(f"📥 [EDGAR] {filing['ticker']} {filing['form']} {filing['filed']}: {state}")
+                except Exception as e:
+                    print(f"⚠️ [EDGAR] Download failed for {filing['url'][-40:]}: {e}")
+        return sorted(results, key=lambda f: (f["cik"], f["form"], f["filed"]), reverse=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch the latest EDGAR filings for a list of CIKs")
+    parser.add_argument("ciks", nargs="+", help="Issuer CIKs, e.g. 1050446")
+    parser.add_argument("--forms", default="10-K", help="Comma-separated form types")
+    parser.add_argument("--per-form", type=int, default=1)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    fetched = EdgarFetcher().fetch(args.ciks, tuple(args.forms.split(",")), args.per_form)
+    changed = sum(f["changed"] for f in fetched)
+    print(f"✅ {len(fetched)} filings ({changed} changed) in {time.perf_counter() - started:.1f}s")
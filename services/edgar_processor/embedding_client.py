@@ -0,0 +1,48 @@
+import os
+import requests
+from langchain_core.embeddings import Embeddings
+
+# --- SHARED EMBEDDING CLIENT ---
+# Drop-in stand-in for HuggingFaceEmbeddings that calls the resident
+# embedding_service.py instead of loading the model in this process.
+# Kept identical in services/edgar_processor and services/market_data.
+EMBEDDING_URL = os.getenv("EMBEDDING_URL", "http://embedding_server:8765")
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+REQUEST_CHUNK = 256  # Texts per HTTP request on bulk ingestion
+
+class RemoteEmbeddings(Embeddings):
+    def __init__(self, url=EMBEDDING_URL, timeout=60):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()  # Keep-alive: no TCP handshake per query
+
+    def _embed(self, texts):
+        res = self.session.post(f"{self.url}/embed", json={"texts": texts}, timeout=self.timeout)
+        res.raise_for_status()
+        return res.json()["embeddings"]
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = []
+        for i in range(0, len(texts), REQUEST_CHUNK):
+            vectors.extend(self._embed(texts[i:i + REQUEST_CHUNK]))
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed([text])[0]
+
+    def healthy(self):
+        try:
+            return self.session.get(f"{self.url}/health", timeout=2).status_code == 200
+        except requests.RequestException:
+            return False
+
+def get_embeddings():
+    """Shared server if it is up, otherwise a private model copy (the old behaviour)."""
+    remote = RemoteEmbeddings()
+    if remote.healthy():
+        print(f"🔗 Using shared embedding server at {remote.url}")
+        return remote
+    print("⚠️ Embedding server unreachable. Loading a local model copy...")
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=MODEL_NAME)
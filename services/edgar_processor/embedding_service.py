@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import queue
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from sentence_transformers import SentenceTransformer
+
+# --- RESIDENT EMBEDDING SERVER ---
+# Loads all-MiniLM-L6-v2 once and serves every RAG entry point over
+# localhost HTTP. Concurrent requests are coalesced into a single
+# forward pass by the MicroBatcher.
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+HOST = os.getenv("EMBEDDING_HOST", "0.0.0.0")
+PORT = int(os.getenv("EMBEDDING_PORT", "8765"))
+MAX_BATCH = 256         # Texts per forward pass
+BATCH_WINDOW = 0.005    # Seconds to wait for more requests after the first one arrives
+
+class MicroBatcher:
+    def __init__(self, model):
+        self.model = model
+        self.jobs = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        threading.Thread(target=self._run, name="embed-batcher", daemon=True).start()
+
+    def embed(self, texts):
+        job = {"texts": texts, "done": threading.Event(), "result": None, "error": None}
+        self.jobs.put(job)
+        job["done"].wait()
+        if job["error"] is not None:
+            raise job["error"]
+        return job["result"]
+
+    def _collect(self):
+        jobs = [self.jobs.get()]
+        size = len(jobs[0]["texts"])
+        deadline = time.monotonic() + BATCH_WINDOW
+        while size < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self.jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job["texts"])
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            # Same newline handling as HuggingFaceEmbeddings, so vectors are identical
+            texts = [t.replace("\n", " ") for job in jobs for t in job["texts"]]
+            try:
+                vectors = self.model.encode(texts, batch_size=64).tolist()
+                offset = 0
+                for job in jobs:
+                    job["result"] = vectors[offset:offset + len(job["texts"])]
+                    offset += len(job["texts"])
+            except Exception as e:
+                for job in jobs:
+                    job["error"] = e
+            self.batches += 1
+            self.texts += len(texts)
+            for job in jobs:
+                job["done"].set()
+
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            b = self.batcher
+            self._reply(200, {"model": MODEL_NAME, "dim": b.model.get_sentence_embedding_dimension(),
+                              "batches": b.batches, "texts": b.texts})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/embed":
+            return self._reply(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))["texts"]
+            self._reply(200, {"embeddings": self.batcher.embed(texts) if texts else []})
+        except Exception as e:
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, *args):
+        pass  # Keep container logs quiet; one line per request is too noisy
+
+
+if __name__ == "__main__":
+    print(f"🧠 Loading {MODEL_NAME} (one resident copy for every RAG client)...")
+    EmbeddingHandler.batcher = MicroBatcher(SentenceTransformer(MODEL_NAME, device="cpu"))
+    server = ThreadingHTTPServer((HOST, PORT), EmbeddingHandler)
+    print(f"✅ Embedding server listening on {HOST}:{PORT}")
+    server.serve_forever()
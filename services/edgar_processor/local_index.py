@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from pgvector.psycopg2 import register_vector
+
+from clearance import get_connection, COLLECTION_NAME
+
+# --- MEMORY-MAPPED LOCAL VAULT INDEX ---
+# Exports a collection's embeddings to <collection>.vectors.npy (unit-norm
+# rows, float32 or float16) plus a <collection>.meta.json sidecar with the
+# row ids, documents and metadata. Queries are one matrix-vector product
+# and an argpartition over the mapped file: no Postgres round-trip. Rebuilds
+# are incremental: only rows added since the last export are pulled from the DB.
+INDEX_DIR = os.getenv("VAULT_INDEX_DIR", "/app/data/vault_index")
+SCAN_BLOCK = 65536  # Rows per matmul block when the matrix is float16
+
+# Metadata rides along (it is small): VaultSync re-cites unchanged chunks in place
+IDS_SQL = """
+    SELECT e.id, e.cmetadata FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = %s;
+"""
+
+ROWS_SQL = """
+    SELECT e.id, e.embedding, e.document, e.cmetadata FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = %s AND e.id = ANY(%s);
+"""
+
+class LocalVectorIndex:
+    def __init__(self, collection_name=COLLECTION_NAME, root=INDEX_DIR):
+        self.collection_name = collection_name
+        self.root = root
+        self.matrix = None
+        self.rows = []
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.root, f"{self.collection_name}.vectors.npy")
+
+    @property
+    def meta_path(self):
+        return os.path.join(self.root, f"{self.collection_name}.meta.json")
+
+    def exists(self):
+        return os.path.exists(self.vectors_path) and os.path.exists(self.meta_path)
+
+    def load(self):
+        """Maps the matrix read-only; pages are faulted in by the OS on first touch."""
+        with open(self.meta_path) as f:
+            self.rows = json.load(f)["rows"]
+        self.matrix = np.load(self.vectors_path, mmap_mode="r")
+        return self
+
+    def _scores(self, query):
+        if self.matrix.dtype == np.float32:
+            return self.matrix @ query
+        # No BLAS for float16: upcast block by block to bound the temporary
+        return np.concatenate([
+            self.matrix[i:i + SCAN_BLOCK].astype(np.float32) @ query
+            for i in range(0, len(self.matrix), SCAN_BLOCK)
+        ])
+
+    def search(self, vector, k=5):
+        """Top-k rows by cosine similarity -> [(row dict, similarity)], best first."""
+        if self.matrix is None:
+            self.load()
+        n = len(self.rows)
+        if n == 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = self._scores(query)
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.rows[i], float(scores[i])) for i in top]
+
+    def similarity_search_with_score(self, text, embeddings, k=5):
+        """PGVector-compatible shape: (row, cosine distance) so callers can keep `1 - score`."""
+        return [(row, 1.0 - sim) for row, sim in self.search(embeddings.embed_query(text), k)]
+
+    def rebuild(self, dtype="float32", full=False):
+        """
+        Brings the export in line with the DB. Rows whose id is unchanged are
+        copied from the current file (with their current metadata); only new
+        ids are fetched. Returns counts.
+        """
+        started = time.perf_counter()
+        old_rows, old_matrix = [], None
+        if self.exists() and not full:
+            self.load()
+            old_rows, old_matrix = self.rows, self.matrix
+
+        conn = get_connection()
+        try:
+            register_vector(conn)
+            with conn, conn.cursor() as cur:
+                cur.execute(IDS_SQL, (self.collection_name,))
+                live = cur.fetchall()
+                live_ids = [row[0] for row in live]
+                live_meta = {row[0]: row[1] for row in live}
+                kept = {row["id"]: i for i, row in enumerate(old_rows)}
+                new_ids = [i for i in live_ids if i not in kept]
+                fetched = {}
+                if new_ids:
+                    cur.execute(ROWS_SQL, (self.collection_name, new_ids))
+                    for row_id, embedding, document, metadata in cur.fetchall():
+                        fetched[row_id] = (embedding, document, metadata)
+        finally:
+            conn.close()
+
+        live_ids = [i for i in live_ids if i in kept or i in fetched]
+        dim = old_matrix.shape[1] if old_matrix is not None and len(old_matrix) else (
+            len(next(iter(fetched.values()))[0]) if fetched else 0)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=dtype, shape=(len(live_ids), dim))
+        rows = []
+        for j, row_id in enumerate(live_ids):
+            if row_id in kept:
+                i = kept[row_id]
+                out[j] = old_matrix[i]
+                rows.append({**old_rows[i], "metadata": live_meta[row_id] or {}})
+            else:
+                embedding, document, metadata = fetched[row_id]
+                vector = np.asarray(embedding, dtype=np.float32)
+                out[j] = vector / (np.linalg.norm(vector) or 1.0)
+                rows.append({"id": row_id, "document": document, "metadata": metadata or {}})
+        out.flush()
+        del out
+        self.matrix = None  # Release the old mapping before replacing the file
+
+        tmp_meta = self.meta_path + ".tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump({"collection": self.collection_name, "dtype": dtype, "dim": dim,
+                       "built_at": time.time(), "rows": rows}, f)
+        # Matrix first, then sidecar: readers pair them by row order
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_meta, self.meta_path)
+        self.load()
+
+        stats = {"rows": len(rows), "added": len(fetched), "removed": len(old_rows) - (len(rows) - len(fetched))}
+        print(f"🗃️ [LOCAL INDEX] {self.collection_name}: {stats['rows']} rows ({stats['added']} added, "
+              f"{stats['removed']} removed) in {time.perf_counter() - started:.2f}s")
+        return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a vault collection to a memory-mapped local index")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--full", action="store_true", help="Re-export every row instead of only new ones")
+    args = parser.parse_args()
+    LocalVectorIndex(args.collection).rebuild(dtype=args.dtype, full=args.full)
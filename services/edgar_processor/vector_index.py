@@ -0,0 +1,260 @@
+import re
+import json
+import time
+import random
+import argparse
+import numpy as np
+
+from clearance import get_connection, COLLECTION_NAME
+
+# --- ANN INDEX MANAGEMENT FOR THE VAULT ---
+# LangChain's PGVector answers similarity_search with
+#   ORDER BY embedding <=> :query WHERE collection_id = :uuid
+# which is a sequential scan unless an index exists. This tool builds one
+# partial HNSW or IVFFlat index per collection (cosine ops, matching
+# LangChain's default distance), tunes the query-time search width, and
+# benchmarks latency and recall@k against exact search, using queries
+# perturbed off the indexed vectors so recall is not inflated by self-hits.
+#
+#   python vector_index.py create --method hnsw
+#   python vector_index.py bench --k 5 --queries 200
+#   python vector_index.py tune --apply
+HNSW_DEFAULTS = {"m": 16, "ef_construction": 64}
+EF_SEARCH_SWEEP = (10, 20, 40, 80, 160, 320)
+PROBES_SWEEP = (1, 2, 4, 8, 16, 32)
+TARGET_RECALL = 0.95
+QUERY_NOISE = 0.5  # Norm of the random offset added to each (unit) bench query, ~0.9 cosine to its source
+
+def _index_name(collection_name, method):
+    return f"ix_vault_{method}_{re.sub(r'[^a-z0-9]+', '_', collection_name.lower())}"
+
+def _collection_uuid(cur, collection_name):
+    cur.execute("SELECT uuid FROM langchain_pg_collection WHERE name = %s;", (collection_name,))
+    row = cur.fetchone()
+    if row is None:
+        raise ValueError(f"Collection '{collection_name}' does not exist.")
+    return str(row[0])
+
+def _ensure_typed_column(cur):
+    """
+    pgvector can only index a column with a fixed dimension; LangChain creates
+    it untyped. Pins the column to the single dimension every row already has.
+    The ALTER rewrites the table under an ACCESS EXCLUSIVE lock, blocking every
+    reader and writer of the vault until it finishes, so it only runs once:
+    an already-typed column is detected from the catalog and left alone.
+    """
+    cur.execute("""
+        SELECT format_type(a.atttypid, a.atttypmod) FROM pg_attribute a
+        WHERE a.attrelid = 'langchain_pg_embedding'::regclass AND a.attname = 'embedding';
+    """)
+    typed = re.fullmatch(r"vector\((\d+)\)", cur.fetchone()[0])
+    if typed:
+        return int(typed.group(1))
+    cur.execute("SELECT DISTINCT vector_dims(embedding) FROM langchain_pg_embedding;")
+    dims = [row[0] for row in cur.fetchall()]
+    if len(dims) != 1:
+        raise ValueError(f"Cannot type the embedding column: found dimensions {dims}.")
+    print(f"📐 [INDEX] Pinning langchain_pg_embedding.embedding to vector({dims[0]}). "
+          f"One-time table rewrite: vault reads and writes block until it completes...")
+    cur.execute(f"ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector({dims[0]});")
+    return dims[0]
+
+def create_index(collection_name=COLLECTION_NAME, method="hnsw", m=HNSW_DEFAULTS["m"],
+                 ef_construction=HNSW_DEFAULTS["ef_construction"], lists=None):
+    """
+    (Re)builds the collection's partial ANN index without blocking readers.
+    The exception is the first run on an untyped column (see _ensure_typed_column).
+    """
+    conn = get_connection()
+    conn.autocommit = True  # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    try:
+        with conn.cursor() as cur:
+            uuid = _collection_uuid(cur, collection_name)
+            dim = _ensure_typed_column(cur)
+            cur.execute("SELECT count(*) FROM langchain_pg_embedding WHERE collection_id = %s;", (uuid,))
+            rows = cur.fetchone()[0]
+            if method == "hnsw":
+                options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+            elif method == "ivfflat":
+                # pgvector guidance: rows/1000 lists up to 1M rows, never fewer than 10
+                lists = int(lists or max(10, rows // 1000))
+                options = f"lists = {lists}"
+            else:
+                raise ValueError(f"Unknown index method '{method}'.")
+
+            name = _index_name(collection_name, method)
+            print(f"🏗️ [INDEX] Building {method.upper()} ({options}) on {rows:,} x {dim}d vectors...")
+            started = time.perf_counter()
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+            cur.execute("SET maintenance_work_mem = '512MB';")
+            cur.execute(
+                f"CREATE INDEX CONCURRENTLY {name} ON langchain_pg_embedding "
+                f"USING {method} (embedding vector_cosine_ops) WITH ({options}) "
+                f"WHERE collection_id = '{uuid}';"
+            )
+            cur.execute("ANALYZE langchain_pg_embedding;")
+            print(f"✅ [INDEX] {name} ready in {time.perf_counter() - started:.1f}s.")
+            return name
+    finally:
+        conn.close()
+
+def drop_index(collection_name=COLLECTION_NAME, method="hnsw"):
+    conn = get_connection()
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_index_name(collection_name, method)};")
+    finally:
+        conn.close()
+
+def list_indexes():
+    conn = get_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                SELECT indexname, pg_size_pretty(pg_relation_size(indexname::regclass)), indexdef
+                FROM pg_indexes WHERE tablename = 'langchain_pg_embedding' AND indexdef ~* 'USING (hnsw|ivfflat)';
+            """)
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+def _search(cur, uuid, vector, k):
+    cur.execute(
+        "SELECT id FROM langchain_pg_embedding WHERE collection_id = %s "
+        "ORDER BY embedding <=> %s::vector LIMIT %s;",
+        (uuid, vector, k),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+def _percentiles(samples_ms):
+    return float(np.percentile(samples_ms, 50)), float(np.percentile(samples_ms, 99))
+
+def _perturb(vector_text, rng, noise):
+    """
+    A query near, but not in, the vault. Querying with an indexed vector is an
+    easy case (its own row is the exact top hit), which inflates recall; adding a
+    random direction of norm `noise` to the unit vector moves it off the graph.
+    """
+    v = np.asarray(json.loads(vector_text), dtype=np.float64)
+    v /= np.linalg.norm(v) or 1.0
+    g = rng.standard_normal(v.shape)
+    q = v + noise * g / np.linalg.norm(g)
+    return "[" + ",".join(f"{x:.7g}" for x in q) + "]"
+
+def benchmark(collection_name=COLLECTION_NAME, k=5, queries=100, ef_search=None, probes=None, seed=7,
+              noise=QUERY_NOISE):
+    """
+    Runs perturbed vault vectors as queries through the ANN plan and through an
+    exact (sequential) plan. Returns p50/p99 latency in ms and recall@k.
+    """
+    conn = get_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            uuid = _collection_uuid(cur, collection_name)
+            cur.execute("SELECT embedding::text FROM langchain_pg_embedding WHERE collection_id = %s;", (uuid,))
+            pool = [row[0] for row in cur.fetchall()]
+            if not pool:
+                raise ValueError(f"Collection '{collection_name}' is empty.")
+            rng = np.random.default_rng(seed)
+            sample = [_perturb(v, rng, noise) for v in random.Random(seed).sample(pool, min(queries, len(pool)))]
+
+            exact, exact_ms = [], []
+            cur.execute("SET LOCAL enable_indexscan = off; SET LOCAL enable_bitmapscan = off;")
+            for vector in sample:
+                started = time.perf_counter()
+                exact.append(_search(cur, uuid, vector, k))
+                exact_ms.append((time.perf_counter() - started) * 1000)
+
+            cur.execute("SET LOCAL enable_indexscan = on; SET LOCAL enable_bitmapscan = on;")
+            if ef_search:
+                cur.execute("SET LOCAL hnsw.ef_search = %s;", (int(ef_search),))
+            if probes:
+                cur.execute("SET LOCAL ivfflat.probes = %s;", (int(probes),))
+            cur.execute(
+                "EXPLAIN SELECT id FROM langchain_pg_embedding WHERE collection_id = %s "
+                "ORDER BY embedding <=> %s::vector LIMIT %s;", (uuid, sample[0], k))
+            plan = "\n".join(row[0] for row in cur.fetchall())
+            ann_ms, hits = [], 0
+            for vector, truth in zip(sample, exact):
+                started = time.perf_counter()
+                found = _search(cur, uuid, vector, k)
+                ann_ms.append((time.perf_counter() - started) * 1000)
+                hits += len(set(found) & set(truth))
+    finally:
+        conn.close()
+
+    ann_p50, ann_p99 = _percentiles(ann_ms)
+    exact_p50, exact_p99 = _percentiles(exact_ms)
+    return {
+        "rows": len(pool), "queries": len(sample), "k": k,
+        "uses_index": "Index Scan" in plan,
+        "ann_p50_ms": ann_p50, "ann_p99_ms": ann_p99,
+        "exact_p50_ms": exact_p50, "exact_p99_ms": exact_p99,
+        "recall_at_k": hits / (len(sample) * k),
+    }
+
+def tune(collection_name=COLLECTION_NAME, k=5, queries=100, method="hnsw", target=TARGET_RECALL, apply=False,
+         noise=QUERY_NOISE):
+    """Sweeps the query-time width and picks the cheapest setting that reaches `target` recall."""
+    param, sweep = ("hnsw.ef_search", EF_SEARCH_SWEEP) if method == "hnsw" else ("ivfflat.probes", PROBES_SWEEP)
+    chosen = None
+    for value in sweep:
+        kwargs = {"ef_search": value} if method == "hnsw" else {"probes": value}
+        report = benchmark(collection_name, k, queries, noise=noise, **kwargs)
+        print_report(report, f"{param}={value}")
+        if report["recall_at_k"] >= target:
+            chosen = value
+            break
+    if chosen is None:
+        print(f"⚠️ [TUNE] No {param} in {sweep} reached recall {target:.0%}.")
+        return None
+    print(f"🎯 [TUNE] {param} = {chosen} reaches recall@{k} >= {target:.0%}.")
+    if apply:
+        # Role-level default: every new session (LangChain, dashboard, agents) picks it up
+        conn = get_connection()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute(f"ALTER ROLE CURRENT_USER SET {param} = {int(chosen)};")
+        finally:
+            conn.close()
+        print(f"💾 [TUNE] Applied {param} = {chosen} as the role default.")
+    return chosen
+
+def print_report(report, label=""):
+    print(f"📊 [BENCH] {label} rows={report['rows']:,} queries={report['queries']} k={report['k']} "
+          f"index={'yes' if report['uses_index'] else 'NO'}")
+    print(f"   ANN   p50 {report['ann_p50_ms']:.2f} ms | p99 {report['ann_p99_ms']:.2f} ms | "
+          f"recall@{report['k']} {report['recall_at_k']:.3f}")
+    print(f"   EXACT p50 {report['exact_p50_ms']:.2f} ms | p99 {report['exact_p99_ms']:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage and benchmark ANN indexes on the PGVector vault")
+    parser.add_argument("command", choices=["create", "drop", "list", "bench", "tune"])
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--m", type=int, default=HNSW_DEFAULTS["m"])
+    parser.add_argument("--ef-construction", type=int, default=HNSW_DEFAULTS["ef_construction"])
+    parser.add_argument("--lists", type=int, default=None, help="IVFFlat lists (default rows/1000, min 10)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, default=None)
+    parser.add_argument("--probes", type=int, default=None)
+    parser.add_argument("--target-recall", type=float, default=TARGET_RECALL)
+    parser.add_argument("--noise", type=float, default=QUERY_NOISE,
+                        help="bench/tune: norm of the random offset that moves queries off the indexed vectors")
+    parser.add_argument("--apply", action="store_true", help="tune: persist the chosen setting for the DB role")
+    args = parser.parse_args()
+
+    if args.command == "create":
+        create_index(args.collection, args.method, args.m, args.ef_construction, args.lists)
+    elif args.command == "drop":
+        drop_index(args.collection, args.method)
+    elif args.command == "list":
+        for name, size, definition in list_indexes():
+            print(f"🗂️ {name} ({size})\n   {definition}")
+    elif args.command == "bench":
+        print_report(benchmark(args.collection, args.k, args.queries, args.ef_search, args.probes,
+                               noise=args.noise))
+    else:
+        tune(args.collection, args.k, args.queries, args.method, args.target_recall, args.apply, args.noise)
@@ -1,9 +1,10 @@
 import os
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores.pgvector import PGVector
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
+from embedding_client import get_embeddings
+
 load_dotenv()
 
 # --- CONNECTION PROTOCOL ---
@@ -14,7 +15,7 @@ COLLECTION_NAME = "institutional_research"
 print("🧠 RIVERFLOW ANALYST AGENT: ONLINE")
 
 # 1. LOAD THE BRAIN (Embeddings + Vector DB)
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+embeddings = get_embeddings()
 store = PGVector(
     connection_string=CONNECTION_STRING,
     collection_name=COLLECTION_NAME,
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import threading
+from datetime import datetime, timezone
+
+from log_files import rotate_file
+
+# --- NON-BLOCKING STRUCTURED LOGGER ---
+# Callers only enqueue a record. A background thread drains the queue in
+# batches, appends them to the log as newline-delimited JSON (one write and
+# one flush per batch), echoes them to the console and rotates by size.
+# The trading loop never waits on disk or on the container's stdout pipe.
+LOG_FILE = "/app/apex_logs.ndjson"
+LOG_MAX_BYTES = int(os.getenv("APEX_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = 3
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+class AsyncLogger:
+    def __init__(self, path=LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS,
+                 echo=None, queue_size=10000, batch_size=512, flush_interval=0.2):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.echo = echo if echo is not None else sys.__stdout__
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="apex-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, level, event, msg, **fields):
+        record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                  "level": level, "event": event, "msg": msg}
+        if fields:
+            record.update(fields)
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1  # Never block the caller; the gap is reported in the next batch
+
+    def debug(self, event, msg, **fields):
+        self.log("DEBUG", event, msg, **fields)
+
+    def info(self, event, msg, **fields):
+        self.log("INFO", event, msg, **fields)
+
+    def warning(self, event, msg, **fields):
+        self.log("WARNING", event, msg, **fields)
+
+    def error(self, event, msg, **fields):
+        self.log("ERROR", event, msg, **fields)
+
+    def critical(self, event, msg, **fields):
+        self.log("CRITICAL", event, msg, **fields)
+
+    def _drain(self):
+        """Blocks for the first record, then takes whatever else is already queued."""
+        try:
+            batch = [self.records.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, f, batch):
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            batch.append({"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                          "level": "WARNING", "event": "logger",
+                          "msg": f"⚠️ [LOGGER] Queue full, dropped {dropped} records.", "dropped": dropped})
+        payload = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+        f.write(payload)
+        f.flush()
+        try:
+            self.echo.write("".join(r["msg"] + "\n" for r in batch))
+            self.echo.flush()
+        except Exception:
+            pass  # Console is best effort; the file is the record
+        return len(payload.encode("utf-8"))
+
+    def _run(self):
+        f = open(self.path, "a", encoding="utf-8")
+        size = f.tell()
+        while True:
+            batch = self._drain()
+            stop = any(r is self._stop for r in batch)
+            batch = [r for r in batch if r is not self._stop]
+            if batch:
+                try:
+                    size += self._write(f, batch)
+                    if size >= self.max_bytes:
+                        f.close()
+                        rotate_file(self.path, self.backups)
+                        f = open(self.path, "a", encoding="utf-8")
+                        size = 0
+                except Exception as e:
+                    try:
+                        self.echo.write(f"⚠️ [LOGGER] Write failed: {e}\n")
+                    except Exception:
+                        pass
+            if stop:
+                f.close()
+                return
+
+    def close(self, timeout=2.0):
+        """Flushes everything queued so far. Safe to call more than once."""
+        if self._thread.is_alive():
+            self.records.put(self._stop)
+            self._thread.join(timeout)
+
+
+class StdoutTap:
+    """
+    Stands in for sys.stdout so print() from any module is queued as an INFO
+    record with event "stdout" instead of writing synchronously.
+    """
+    def __init__(self, logger, event="stdout"):
+        self.logger = logger
+        self.event = event
+        self.partial = ""
+
+    def write(self, message):
+        self.partial += message
+        if "\n" in self.partial:
+            *lines, self.partial = self.partial.split("\n")
+            for line in lines:
+                if line:
+                    self.logger.info(self.event, line)
+        return len(message)
+
+    def flush(self):
+        pass  # The writer thread owns flushing
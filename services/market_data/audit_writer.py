@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, InterfaceError, DBAPIError, TimeoutError as PoolTimeout
+import metrics
+
+# --- ASYNCHRONOUS AUDIT LEDGER WRITER ---
+# The trade path only enqueues a record. A background thread batch-inserts
+# into execution_audit. While the DB is unreachable, batches are appended
+# to a local NDJSON spill file (fsynced); once the DB answers again the
+# spill is replayed in one transaction before any newer rows, so the ledger
+# stays complete and in order across an outage. Only connection-class
+# errors count as an outage: a row the DB rejects (bad data, constraint)
+# is isolated by retrying its batch row by row and moved to a dead-letter
+# file, so it cannot wedge every later record behind it on disk.
+AUDIT_SPILL_FILE = "/app/audit_spill.ndjson"
+AUDIT_REJECT_FILE = "/app/audit_rejected.ndjson"
+
+INSERT_SQL = text("""
+    INSERT INTO execution_audit
+    (time, symbol, action, price, rsi, macd, sma_200, ai_score, rag_reasoning)
+    VALUES
+    (:time, :symbol, :action, :price, :rsi, :macd, :sma_200, :ai_score, :rag_reasoning)
+""")
+
+def is_unreachable(e):
+    """Connection-class failures (retry later) as opposed to errors about the rows themselves."""
+    if isinstance(e, (OperationalError, InterfaceError, PoolTimeout)):
+        return True
+    return isinstance(e, DBAPIError) and e.connection_invalidated
+
+class Unreachable(Exception):
+    """The DB went away mid-write; `pending` holds the rows that were not committed."""
+    def __init__(self, pending, cause):
+        super().__init__(str(cause))
+        self.pending = pending
+
+class AuditWriter:
+    def __init__(self, engine, spill_path=AUDIT_SPILL_FILE, reject_path=AUDIT_REJECT_FILE, logger=None,
+                 queue_size=1000, batch_size=200, flush_interval=0.5, retry_interval=5.0):
+        self.engine = engine
+        self.spill_path = spill_path
+        self.replay_path = spill_path + ".replaying"
+        self.reject_path = reject_path
+        self.log = logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.records = queue.Queue(maxsize=queue_size)
+        self.spill_lock = threading.Lock()
+        self.db_ok = True
+        self._stop = object()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _say(self, level, msg, **fields):
+        if self.log is not None:
+            self.log.log(level, "audit", msg, **fields)
+        else:
+            print(msg)
+
+    def submit(self, **record):
+        """Never blocks on the DB. Stamps the trade time now, not at insert."""
+        record.setdefault("time", datetime.now(timezone.utc).isoformat())
+        try:
+            self.records.put_nowait(record)
+        except queue.Full:
+            # Writer is far behind: go straight to disk rather than stall or drop
+            self._spill([record])
+
+    def _append(self, path, batch, mode="a"):
+        with open(path, mode, encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, default=str) + "\n" for r in batch))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _spill(self, batch):
+        metrics.inc("audit_spilled", len(batch))
+        with self.spill_lock:
+            self._append(self.spill_path, batch)
+
+    def _reject(self, record, error):
+        metrics.inc("audit_rejected")
+        self._append(self.reject_path, [dict(record, audit_error=str(error))])
+        self._say("ERROR", f"🚫 [AUDIT] Row rejected by execution_audit, moved to {self.reject_path}: {error}",
+                  symbol=record.get("symbol"), action=record.get("action"))
+
+    def _insert(self, batch):
+        with metrics.timer("audit_insert"), self.engine.begin() as conn:  # One transaction per batch
+            conn.execute(INSERT_SQL, batch)
+
+    def _write(self, batch):
+        """
+        Inserts a batch in one transaction. If the DB rejects it, retries row by
+        row and dead-letters the rows that still fail. Returns the number of rows
+        written. Raises Unreachable with the uncommitted rows on a
+        connection-class error.
+        """
+        try:
+            self._insert(batch)
+            return len(batch)
+        except Exception as e:
+            if is_unreachable(e):
+                raise Unreachable(batch, e) from e
+        written = 0
+        for i, record in enumerate(batch):
+            try:
+                self._insert([record])
+                written += 1
+            except Exception as e:
+                if is_unreachable(e):
+                    raise Unreachable(batch[i:], e) from e
+                self._reject(record, e)
+        return written
+
+    def _read_spill(self, path):
+        records = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn tail from a crash mid-append
+        return records
+
+    def _replay(self):
+        """Drains spilled records into the DB, oldest file first. False if the DB is still down."""
+        while True:
+            with self.spill_lock:
+                if not os.path.exists(self.replay_path):
+                    if not os.path.exists(self.spill_path):
+                        return True
+                    # Freeze the current spill; new spills start a fresh file
+                    os.replace(self.spill_path, self.replay_path)
+            records = self._read_spill(self.replay_path)
+            try:
+                written = self._write(records) if records else 0
+            except Unreachable as e:
+                if len(e.pending) < len(records):
+                    # Part of the file is committed: keep only the rest so it is not inserted twice
+                    tmp = self.replay_path + ".tmp"
+                    self._append(tmp, e.pending, mode="w")
+                    os.replace(tmp, self.replay_path)
+                self._say("WARNING", f"⚠️ [AUDIT] Replay deferred, DB still unreachable: {e}")
+                return False
+            os.remove(self.replay_path)
+            self._say("INFO", f"♻️ [AUDIT] Replayed {written} spilled records into execution_audit.",
+                      replayed=written)
+
+    def _drain(self):
+        try:
+            batch = [self.records.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.records.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _on_disk(self):
+        return os.path.exists(self.spill_path) or os.path.exists(self.replay_path)
+
+    def _run(self):
+        next_retry = 0.0
+        while True:
+            batch = self._drain()
+            stop = any(r is self._stop for r in batch)
+            batch = [r for r in batch if r is not self._stop]
+
+            # Spilled rows (outage, overflow or a previous run) go in before newer ones.
+            # While the DB is down it is only probed every retry_interval.
+            if (not self.db_ok or self._on_disk()) and time.monotonic() >= next_retry:
+                self.db_ok = self._replay()
+                if not self.db_ok:
+                    next_retry = time.monotonic() + self.retry_interval
+
+            if batch:
+                if self.db_ok:
+                    try:
+                        written = self._write(batch)
+                        self._say("INFO", f"🔏 [AUDIT] {written} execution(s) securely logged to TimescaleDB.",
+                                  rows=written)
+                    except Unreachable as e:
+                        self.db_ok = False
+                        next_retry = time.monotonic() + self.retry_interval
+                        self._say("ERROR", f"⚠️ [AUDIT ERROR] DB unreachable, spilling to {self.spill_path}: {e}")
+                        self._spill(e.pending)
+                else:
+                    self._spill(batch)
+            if stop:
+                return
+
+    def close(self, timeout=5.0):
+        if self._thread.is_alive():
+            self.records.put(self._stop)
+            self._thread.join(timeout)
@@ -0,0 +1,92 @@
+import os
+import pandas as pd
+import pyarrow as pa
+import yfinance as yf
+
+# --- LOCAL COLUMNAR BAR CACHE ---
+# One Arrow IPC file per (symbol, interval). Arrow IPC is laid out exactly
+# like memory, so load() memory-maps the file and hands pandas zero-copy
+# column views: no parsing, no network, identical bars on every run.
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "bars"))
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+class BarStore:
+    def __init__(self, root=BAR_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, symbol, interval):
+        safe = symbol.replace("/", "-")
+        return os.path.join(self.root, f"{safe}_{interval}.arrow")
+
+    # 1. READ PATH
+    def load(self, symbol, interval):
+        """Memory-maps the cached bars. Returns None if nothing is cached yet."""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        index = pd.DatetimeIndex(table.column("time").to_numpy(), name="time").tz_localize("UTC")
+        return pd.DataFrame(
+            {col: table.column(col).to_numpy() for col in COLUMNS},
+            index=index, copy=False,
+        )
+
+    # 2. WRITE PATH
+    def write(self, symbol, interval, df):
+        index = df.index.tz_convert("UTC") if df.index.tz is not None else df.index.tz_localize("UTC")
+        table = pa.table({
+            "time": pa.array(index.tz_localize(None).values.astype("datetime64[ns]")),
+            **{col: pa.array(df[col].to_numpy(dtype="float64")) for col in COLUMNS},
+        })
+        # Write-then-rename so readers (and live memory maps) never see a torn file
+        path = self.path(symbol, interval)
+        tmp = f"{path}.tmp"
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+
+    # 3. INCREMENTAL SYNC
+    @staticmethod
+    def _download(symbol, interval, **window):
+        df = yf.download(symbol, interval=interval, progress=False, **window)
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.droplevel(1)
+        df = df.rename(columns={'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'})
+        if "volume" not in df:
+            df["volume"] = 0.0
+        return df[list(COLUMNS)].dropna()
+
+    def sync(self, symbol, interval, period="2y"):
+        """Downloads only the bars after the cached tail (a full `period` on first run)."""
+        cached = self.load(symbol, interval)
+        if cached is None or cached.empty:
+            print(f"📥 [BAR STORE] Cold cache: downloading {period} of {symbol} {interval} bars...")
+            fresh = self._download(symbol, interval, period=period)
+            merged = fresh
+        else:
+            # Re-fetch from the last cached bar: it may have been stored while still forming
+            last = cached.index[-1]
+            fresh = self._download(symbol, interval, start=last.to_pydatetime())
+            if fresh.empty:
+                return cached
+            fresh.index = fresh.index.tz_convert("UTC") if fresh.index.tz is not None else fresh.index.tz_localize("UTC")
+            merged = pd.concat([cached[cached.index < fresh.index[0]], fresh])
+            print(f"📥 [BAR STORE] Appended {len(merged) - len(cached):+,} bars to {symbol} {interval}.")
+
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self.write(symbol, interval, merged)
+        return self.load(symbol, interval)
+
+    def get(self, symbol, interval, period="2y", refresh=True):
+        """Cache-first read. Falls back to whatever is on disk if the network is unavailable."""
+        if refresh:
+            try:
+                return self.sync(symbol, interval, period)
+            except Exception as e:
+                print(f"⚠️ [BAR STORE] Sync failed ({e}). Serving cached bars.")
+        cached = self.load(symbol, interval)
+        if cached is None:
+            raise RuntimeError(f"No cached bars for {symbol} {interval} and sync is unavailable.")
+        return cached
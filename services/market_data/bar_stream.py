@@ -0,0 +1,144 @@
+import os
+import time
+import threading
+import numpy as np
+from confluent_kafka import Consumer
+
+import wire
+
+# --- LIVE BAR STREAM ---
+# Consumes the producer's market_trades topic, folds ticks into 1-minute
+# bars for every symbol in the universe and publishes each closed minute
+# as one column of a (symbols x bars) ring buffer. The trading loop waits
+# on the ring instead of polling Binance REST.
+KAFKA_BROKER = os.getenv('KAFKA_BROKER', 'redpanda:9092')
+BAR_NS = 60 * 1_000_000_000
+CLOSE_GRACE_NS = 2 * 1_000_000_000  # Close an idle bar this long after its minute ends
+
+class BarRing:
+    """Fixed-capacity ring of closed bars. `count` is a monotonic sequence number."""
+    FIELDS = ("open", "high", "low", "close", "ticks")
+
+    def __init__(self, n_symbols, capacity=300):
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.int64)  # bar open time, epoch ms
+        self.cols = {f: np.zeros((n_symbols, capacity), dtype=np.float64) for f in self.FIELDS}
+        self.count = 0
+        self.cond = threading.Condition()
+
+    def append(self, t_ms, o, h, l, c, ticks):
+        with self.cond:
+            i = self.count % self.capacity
+            self.time[i] = t_ms
+            for field, column in zip(self.FIELDS, (o, h, l, c, ticks)):
+                self.cols[field][:, i] = column
+            self.count += 1
+            self.cond.notify_all()
+
+    def since(self, seq):
+        """
+        Bars closed after sequence `seq` -> (bars, new_seq, gap), where bars is
+        {"time": (k,), "close": (symbols, k), ...} or None.
+        """
+        with self.cond:
+            count = self.count
+            if count <= seq:
+                return None, seq, False
+            start = max(seq, count - self.capacity)
+            idx = np.arange(start, count) % self.capacity
+            bars = {"time": self.time[idx], **{f: a[:, idx] for f, a in self.cols.items()}}
+            # gap=True means the reader fell more than a full ring behind
+            return bars, count, start > seq
+
+    def wait(self, seq, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.count > seq, timeout)
+        return self.since(seq)
+
+
+class MarketStream(threading.Thread):
+    """Background Kafka reader that builds aligned 1m bars for a symbol universe."""
+
+    def __init__(self, symbols, capacity=300, group_id="apex_strategy"):
+        super().__init__(name="market-stream", daemon=True)
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.ring = BarRing(n, capacity)
+        self.last_bar_at = None  # wall clock of the most recent closed bar
+        self.bucket = None       # open time (ns) of the forming bar
+        self.last_close = np.full(n, np.nan)  # Seeded from the warmup closes, see seed()
+        self.close_lock = threading.Lock()
+        self._reset_forming()
+        self.consumer = Consumer({
+            'bootstrap.servers': KAFKA_BROKER,
+            'group.id': group_id,
+            # Live signals only care about now; never replay history
+            'auto.offset.reset': 'latest',
+            'enable.auto.commit': False,
+        })
+
+    def _reset_forming(self):
+        n = len(self.symbols)
+        self.ohlc = np.full((4, n), np.nan)
+        self.ticks = np.zeros(n)
+
+    def seed(self, closes):
+        """Warmup closes for symbols that have not traded on the stream yet."""
+        closes = np.asarray(closes, dtype=np.float64)
+        with self.close_lock:
+            self.last_close = np.where(np.isnan(self.last_close), closes, self.last_close)
+
+    def _close_bar(self):
+        o, h, l, c = self.ohlc
+        with self.close_lock:
+            # Symbols that did not trade this minute carry their last close forward
+            quiet = self.ticks == 0
+            for row in (o, h, l, c):
+                row[quiet] = self.last_close[quiet]
+            self.last_close = c.copy()
+        # A symbol with neither a warmup close nor a tick yet has no price: publishing
+        # the bar would put NaN in its 200-SMA window for 200 bars, so hold the ring back
+        if not np.isnan(c).any():
+            self.ring.append(self.bucket // 1_000_000, o, h, l, c, self.ticks)
+            self.last_bar_at = time.time()
+        self.bucket = None
+        self._reset_forming()
+
+    def on_tick(self, symbol, ts_ns, price):
+        i = self.index.get(symbol)
+        if i is None:
+            return
+        bucket = ts_ns - ts_ns % BAR_NS
+        if self.bucket is not None and bucket < self.bucket:
+            return  # Late tick for an already-closed minute
+        if self.bucket is not None and bucket > self.bucket:
+            self._close_bar()
+        self.bucket = bucket
+        if self.ticks[i] == 0:
+            self.ohlc[:, i] = price
+        else:
+            self.ohlc[1, i] = max(self.ohlc[1, i], price)
+            self.ohlc[2, i] = min(self.ohlc[2, i], price)
+            self.ohlc[3, i] = price
+        self.ticks[i] += 1
+
+    def stale_for(self):
+        return float("inf") if self.last_bar_at is None else time.time() - self.last_bar_at
+
+    def run(self):
+        self.consumer.subscribe(['market_trades'])
+        print(f"📡 [STREAM] Building 1m bars for {', '.join(self.symbols)} from market_trades...")
+        while True:
+            try:
+                for msg in self.consumer.consume(num_messages=1000, timeout=0.5):
+                    if msg.error():
+                        continue
+                    quote = wire.decode(msg.value())
+                    self.on_tick(quote["symbol"], quote["ts_ns"], quote["bid"])
+                # Quiet market: close the bar on the clock rather than waiting for the next tick
+                if self.bucket is not None and time.time_ns() > self.bucket + BAR_NS + CLOSE_GRACE_NS:
+                    self._close_bar()
+            except Exception as e:
+                print(f"⚠️ [STREAM] {e}")
+                time.sleep(1)
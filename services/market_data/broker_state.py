@@ -0,0 +1,339 @@
+import os
+import time
+import queue
+import asyncio
+import argparse
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import metrics
+
+# --- LOCAL BROKER MIRROR ---
+# Cash, positions and open orders are seeded once from Alpaca REST and then
+# kept current from the trade_updates websocket, so sizing and position
+# management read memory instead of paying a REST round-trip per cycle.
+# A background reconcile re-reads REST periodically (faster while the
+# stream is down) and overwrites the mirror, logging any drift it corrects.
+RECONCILE_INTERVAL = int(os.getenv("MIRROR_RECONCILE_INTERVAL", "60"))  # seconds
+DOWN_RECONCILE_INTERVAL = 10   # Stream disconnected: REST is the only source of truth
+QTY_EPSILON = 1e-9             # Crypto quantities are fractional
+TERMINAL_EVENTS = ("fill", "canceled", "expired", "rejected", "replaced", "done_for_day")
+
+def _symbol(symbol):
+    """Orders say "BTC/USD", positions say "BTCUSD": the mirror keys on the latter."""
+    return str(symbol).replace("/", "")
+
+def _value(field):
+    """alpaca-py enums (side, event) and plain strings alike."""
+    return getattr(field, "value", field)
+
+class LocalPosition:
+    """Same attributes the REST Position exposes to the strategy."""
+    __slots__ = ("symbol", "qty", "avg_entry_price")
+
+    def __init__(self, symbol, qty, avg_entry_price):
+        self.symbol = symbol
+        self.qty = qty
+        self.avg_entry_price = avg_entry_price
+
+    def __repr__(self):
+        return f"LocalPosition({self.symbol}, qty={self.qty:g}, avg={self.avg_entry_price:,.2f})"
+
+class BrokerMirror:
+    """
+    In-process account/position/order book. `stream_factory()` must return an
+    object with subscribe_trade_updates(async handler) and a blocking run(),
+    i.e. alpaca-py's TradingStream or LocalTradeStream below.
+    """
+
+    def __init__(self, api, stream_factory, logger, reconcile_interval=RECONCILE_INTERVAL):
+        self.api = api
+        self.stream_factory = stream_factory
+        self.log = logger
+        self.reconcile_interval = reconcile_interval
+        self.lock = threading.Lock()
+        self.cash = 0.0
+        self.equity = 0.0
+        self.book = {}     # symbol -> LocalPosition
+        self.orders = {}   # order id -> {"symbol", "side", "qty", "filled", "reserve"}
+        self.done = deque(maxlen=1000)  # Terminal order ids, for fills that beat track()
+        self.version = 0   # Bumped by every local write (trade update or track)
+        self.stream = None # The live stream object, while run() is executing
+        self.synced_at = None
+        self.wake = threading.Event()
+
+    @property
+    def stream_up(self):
+        """
+        True only while the socket is open and authenticated. TradingStream.run()
+        retries internally and never returns, so entering run() proves nothing;
+        it sets _running once _start_ws() has connected and authed.
+        """
+        stream = self.stream
+        return stream is not None and bool(getattr(stream, "_running", False))
+
+    # --- READS (trade path) ---
+    def positions(self):
+        with self.lock:
+            return list(self.book.values())
+
+    def position(self, symbol):
+        with self.lock:
+            return self.book.get(_symbol(symbol))
+
+    def has_open(self, symbol, side):
+        """True while an order on this side is still working, so exits are not re-submitted."""
+        symbol = _symbol(symbol)
+        with self.lock:
+            return any(o["symbol"] == symbol and o["side"] == side for o in self.orders.values())
+
+    def spendable(self):
+        """Cash not already committed to open buy orders."""
+        with self.lock:
+            return self.cash - sum(o["reserve"] for o in self.orders.values())
+
+    def track(self, order, price):
+        """Reserves cash for a just-submitted buy until its fills arrive on the stream."""
+        order_id = str(order.id)
+        with self.lock:
+            if order_id in self.done:
+                return  # Already filled (or rejected) before the REST call returned
+            qty = float(order.qty)
+            entry = self.orders.setdefault(order_id, {"symbol": _symbol(order.symbol), "side": _value(order.side),
+                                                      "qty": qty, "filled": 0.0, "reserve": 0.0})
+            if entry["side"] == "buy":
+                entry["reserve"] = (qty - entry["filled"]) * price
+            self.version += 1  # A reconcile already in flight must not drop this reserve
+
+    def request_reconcile(self):
+        self.wake.set()
+
+    # --- STREAM (writes) ---
+    def apply(self, update):
+        """Folds one trade_updates message into the book."""
+        event = _value(update.event)
+        order = update.order
+        order_id, side = str(order.id), _value(order.side)
+        symbol = _symbol(order.symbol)
+        with self.lock:
+            entry = self.orders.setdefault(order_id, {"symbol": symbol, "side": side, "qty": float(order.qty or 0),
+                                                      "filled": 0.0, "reserve": 0.0})
+            if event in ("fill", "partial_fill") and update.qty:
+                qty, price = float(update.qty), float(update.price)
+                entry["filled"] += qty
+                if side == "buy":
+                    entry["reserve"] = max(0.0, entry["reserve"] - qty * price)
+                    self.cash -= qty * price
+                    held = self.book.get(symbol)
+                    if held is None:
+                        self.book[symbol] = LocalPosition(symbol, qty, price)
+                    else:
+                        total = held.qty + qty
+                        held.avg_entry_price = (held.qty * held.avg_entry_price + qty * price) / total
+                        held.qty = total
+                else:
+                    self.cash += qty * price
+                    held = self.book.get(symbol)
+                    if held is not None:
+                        held.qty -= qty
+                # The broker's own post-fill position is authoritative when present
+                held = self.book.get(symbol)
+                if held is not None and update.position_qty is not None:
+                    held.qty = float(update.position_qty)
+                if held is not None and abs(held.qty) < QTY_EPSILON:
+                    del self.book[symbol]
+            if event in TERMINAL_EVENTS:
+                self.orders.pop(order_id, None)
+                self.done.append(order_id)
+            self.version += 1
+        metrics.inc("trade_updates", event=event)
+
+    async def _on_update(self, update):
+        try:
+            self.apply(update)
+        except Exception as e:
+            self.log.error("mirror", f"⚠️ [MIRROR] Could not apply trade update: {e}")
+            self.request_reconcile()
+
+    def _stream(self):
+        while True:
+            try:
+                stream = self.stream_factory()
+                stream.subscribe_trade_updates(self._on_update)
+                self.stream = stream
+                # Anything that happened while disconnected is only visible over REST
+                self.request_reconcile()
+                stream.run()
+                self.log.warning("mirror", "⚠️ [MIRROR] trade_updates stream ended. Reconnecting...")
+            except Exception as e:
+                self.log.warning("mirror", f"⚠️ [MIRROR] trade_updates stream error: {e}")
+            self.stream = None
+            time.sleep(5)
+
+    # --- REST (seed + reconcile) ---
+    def _snapshot(self):
+        with metrics.timer("alpaca_reconcile"):
+            account = self.api.get_account()
+            positions = self.api.list_positions()
+            orders = self.api.list_orders(status="open")
+        return account, positions, orders
+
+    def sync(self):
+        """Replaces the mirror with a REST snapshot. False if trade updates raced the read (retry shortly)."""
+        version = self.version
+        account, positions, orders = self._snapshot()
+        book = {p.symbol: LocalPosition(p.symbol, float(p.qty), float(p.avg_entry_price)) for p in positions}
+        with self.lock:
+            if self.version != version:
+                return False
+            drift = {s for s in set(book) | set(self.book)
+                     if abs((book[s].qty if s in book else 0.0)
+                            - (self.book[s].qty if s in self.book else 0.0)) > QTY_EPSILON}
+            cash_drift = float(account.cash) - self.cash
+            first = self.synced_at is None
+            open_orders = {}
+            for o in orders:
+                known = self.orders.get(str(o.id), {})
+                open_orders[str(o.id)] = {
+                    "symbol": _symbol(o.symbol), "side": _value(o.side), "qty": float(o.qty or 0),
+                    "filled": float(o.filled_qty or 0),
+                    # Keep the price-based reserve from track(); limit orders can be priced directly
+                    "reserve": known.get("reserve") or (
+                        (float(o.qty or 0) - float(o.filled_qty or 0)) * float(o.limit_price)
+                        if _value(o.side) == "buy" and o.limit_price else 0.0),
+                }
+            self.cash, self.equity = float(account.cash), float(account.equity)
+            self.book, self.orders = book, open_orders
+            self.synced_at = time.time()
+        if not first and (drift or abs(cash_drift) > 0.01):
+            metrics.inc("mirror_drift")
+            self.log.warning("mirror", f"🔁 [MIRROR] Reconcile corrected drift: positions {sorted(drift)}, "
+                             f"cash {cash_drift:+,.2f}", symbols=sorted(drift), cash_drift=cash_drift)
+        return True
+
+    def _reconcile(self):
+        was_up, last = False, time.monotonic()
+        while True:
+            # Poll at the down cadence so a dropped stream switches to fast reconciles within one tick
+            woken = self.wake.wait(min(DOWN_RECONCILE_INTERVAL, self.reconcile_interval))
+            self.wake.clear()
+            up = self.stream_up
+            if up != was_up:
+                self.log.info("mirror", f"🪞 [MIRROR] trade_updates stream {'connected' if up else 'down'}.",
+                              stream_up=up)
+                was_up = up
+            if not woken and up and time.monotonic() - last < self.reconcile_interval:
+                continue
+            last = time.monotonic()
+            try:
+                if not self.sync():
+                    time.sleep(1)
+                    self.wake.set()
+            except Exception as e:
+                self.log.warning("mirror", f"⚠️ [MIRROR] Reconcile failed: {e}")
+
+    def start(self):
+        """Seeds from REST (retrying until it succeeds), then starts the stream and reconcile threads."""
+        while True:
+            try:
+                if self.sync():
+                    break
+            except Exception as e:
+                self.log.warning("mirror", f"⚠️ [MIRROR] Seed failed: {e}. Retrying...")
+                time.sleep(5)
+        self.log.info("mirror", f"🪞 [MIRROR] Seeded: cash ${self.cash:,.2f}, {len(self.book)} position(s), "
+                      f"{len(self.orders)} open order(s).", cash=self.cash, positions=len(self.book))
+        threading.Thread(target=self._stream, name="trade-updates", daemon=True).start()
+        threading.Thread(target=self._reconcile, name="mirror-reconcile", daemon=True).start()
+        return self
+
+
+# --- LOCAL STAND-IN FOR THE TRADE_UPDATES STREAM ---
+class LocalTradeStream:
+    """
+    Drop-in for alpaca-py's TradingStream: push() queues updates shaped like
+    its TradeUpdate model and run() delivers them to the async handler in order.
+    """
+    _STOP = object()
+
+    def __init__(self):
+        self.updates = queue.Queue()
+        self.handler = None
+        self._running = False  # Mirrors TradingStream: True while connected
+
+    def subscribe_trade_updates(self, handler):
+        self.handler = handler
+
+    def push(self, event, order_id, symbol, side, qty, price=None, fill_qty=None, position_qty=None):
+        order = SimpleNamespace(id=order_id, symbol=symbol, side=side, qty=qty)
+        self.updates.put(SimpleNamespace(event=event, order=order, price=price, qty=fill_qty,
+                                         position_qty=position_qty, timestamp=time.time()))
+
+    def drain(self):
+        """Blocks until every pushed update has been handled."""
+        self.updates.join()
+
+    def stop(self):
+        self.updates.put(self._STOP)
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        self._running = True
+        try:
+            while True:
+                update = self.updates.get()
+                try:
+                    if update is self._STOP:
+                        return
+                    loop.run_until_complete(self.handler(update))
+                finally:
+                    self.updates.task_done()
+        finally:
+            self._running = False
+            loop.close()
+
+class SnapshotREST:
+    """Stand-in for the REST client: serves a fixed account/positions/orders snapshot."""
+
+    def __init__(self, cash, positions=(), orders=()):
+        self.account = SimpleNamespace(cash=str(cash), equity=str(cash))
+        self.held = [SimpleNamespace(symbol=s, qty=str(q), avg_entry_price=str(p)) for s, q, p in positions]
+        self.open = list(orders)
+
+    def get_account(self):
+        return self.account
+
+    def list_positions(self):
+        return self.held
+
+    def list_orders(self, status="open"):
+        return self.open
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    from apex_log import AsyncLogger
+
+    parser = argparse.ArgumentParser(description="Replay a scripted fill sequence through the broker mirror")
+    parser.add_argument("--cash", type=float, default=100000.0)
+    parser.add_argument("--log", default=os.path.join(tempfile.gettempdir(), "broker_state_replay.ndjson"),
+                        help="NDJSON log for the replay (a real file: the logger rotates it by size)")
+    args = parser.parse_args()
+
+    stream = LocalTradeStream()
+    mirror = BrokerMirror(SnapshotREST(args.cash, [("ETHUSD", 2.0, 3000.0)]), lambda: stream,
+                          AsyncLogger(path=args.log, echo=sys.__stdout__), reconcile_interval=3600)
+    mirror.start()
+    time.sleep(1)  # Let the connect-time reconcile land before scripting fills
+    script = [
+        ("new", "o-1", "BTC/USD", "buy", 0.1, None, None, None),
+        ("partial_fill", "o-1", "BTC/USD", "buy", 0.1, 60000.0, 0.04, 0.04),
+        ("fill", "o-1", "BTC/USD", "buy", 0.1, 60500.0, 0.06, 0.1),
+        ("fill", "o-2", "ETH/USD", "sell", 2.0, 3100.0, 2.0, 0.0),
+    ]
+    for step in script:
+        stream.push(*step)
+        stream.drain()
+        print(f"{step[0]:>12} {step[1]} {step[3]:>4} {step[2]} -> cash ${mirror.cash:,.2f} | "
+              f"spendable ${mirror.spendable():,.2f} | {mirror.positions()}")
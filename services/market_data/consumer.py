@@ -1,7 +1,12 @@
 import os
-import json
+import io
+import csv
+import time
 import psycopg2
-from confluent_kafka import Consumer
+from confluent_kafka import Consumer, TopicPartition, KafkaException
+
+import wire
+from ohlcv import apply_schema
 
 # 1. Configuration
 KAFKA_BROKER = os.getenv('KAFKA_BROKER', 'redpanda:9092')
@@ -11,6 +16,11 @@ DB_USER = os.getenv('POSTGRES_USER', 'admin')
 DB_PASS = os.getenv('POSTGRES_PASSWORD', 'secretpassword')
 DB_PORT = "5432"
 
+# Micro-batch limits: flush whichever trips first
+BATCH_MAX_ROWS = int(os.getenv('BATCH_MAX_ROWS', '5000'))
+BATCH_MAX_AGE = float(os.getenv('BATCH_MAX_AGE', '0.5'))  # seconds
+RETRY_BACKOFF = 2.0
+
 # 2. Database Connection
 def get_db_connection():
     conn = psycopg2.connect(
@@ -23,68 +33,179 @@ def get_db_connection():
     return conn
 
 # 3. Kafka Consumer Setup
+# Offsets are committed by hand, and only after the rows are durable in TimescaleDB
 conf = {
     'bootstrap.servers': KAFKA_BROKER,
     'group.id': 'db_writer_group',
-    'auto.offset.reset': 'earliest'
+    'auto.offset.reset': 'earliest',
+    'enable.auto.commit': False,
 }
 print(f"🔌 Connecting to Kafka at {KAFKA_BROKER}...")
 consumer = Consumer(conf)
 consumer.subscribe(['market_trades'])
 
+def parse_message(raw):
+    # Accepts both the binary v1 and legacy JSON wire formats
+    data = wire.decode(raw)
+    # We handle both 'quote' and 'trade' types
+    return (wire.from_epoch_ns(data['ts_ns']).isoformat(), data['symbol'], data['bid'], 0, data['type'])
+
+# 4. The Batch Writer
+class BatchWriter:
+    """Buffers rows and ships them to market_candles with a single COPY per batch."""
+    COPY_SQL = "COPY market_candles (time, symbol, price, volume, type) FROM STDIN WITH (FORMAT csv)"
+    INSERT_SQL = "INSERT INTO market_candles (time, symbol, price, volume, type) VALUES (%s, %s, %s, %s, %s)"
+
+    def __init__(self, max_rows=BATCH_MAX_ROWS, max_age=BATCH_MAX_AGE):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.rows = []
+        self.pending = 0          # Kafka messages covered by this batch (incl. skipped ones)
+        self.offsets = {}         # (topic, partition) -> highest offset in this batch
+        self.opened_at = None
+        self.conn = get_db_connection()
+
+    def add(self, msg):
+        if self.opened_at is None:
+            self.opened_at = time.monotonic()
+        self.pending += 1
+        self.offsets[(msg.topic(), msg.partition())] = msg.offset()
+        try:
+            self.rows.append(parse_message(msg.value()))
+        except Exception as e:
+            # Poison message: skip it, but let its offset be committed with the batch
+            print(f"❌ Parse Error at offset {msg.offset()}: {e}")
+
+    def due(self):
+        if self.opened_at is None:
+            return False
+        return len(self.rows) >= self.max_rows or time.monotonic() - self.opened_at >= self.max_age
+
+    def _copy(self):
+        buf = io.StringIO()
+        csv.writer(buf).writerows(self.rows)
+        buf.seek(0)
+        with self.conn.cursor() as cur:
+            cur.copy_expert(self.COPY_SQL, buf)
+        self.conn.commit()
+
+    def _insert_rows(self):
+        """
+        Fallback when COPY rejects the batch: one transaction, a savepoint per row.
+        Rows the DB refuses are skipped (their offsets still commit with the batch).
+        """
+        skipped = 0
+        with self.conn.cursor() as cur:
+            for row in self.rows:
+                cur.execute("SAVEPOINT row")
+                try:
+                    cur.execute(self.INSERT_SQL, row)
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise
+                except psycopg2.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT row")
+                    skipped += 1
+                    print(f"❌ Rejected row {row}: {e}")
+                else:
+                    cur.execute("RELEASE SAVEPOINT row")
+        self.conn.commit()
+        return skipped
+
+    def _rollback(self):
+        try:
+            self.conn.rollback()
+        except psycopg2.Error:
+            pass
+
+    def flush(self):
+        """
+        Writes the batch, then commits Kafka offsets. Blocks (back-pressure) while
+        the DB is unreachable; a batch the DB rejects is retried row by row so one
+        poison row cannot stall ingestion.
+        """
+        if self.pending == 0:
+            return
+        skipped = 0
+        while True:
+            try:
+                if self.rows:
+                    try:
+                        self._copy()
+                    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                        raise
+                    except psycopg2.Error as e:
+                        print(f"⚠️ COPY rejected ({len(self.rows)} rows): {e}. Isolating bad rows...")
+                        self._rollback()
+                        skipped = self._insert_rows()
+                break
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                print(f"❌ Batch Insert Error ({len(self.rows)} rows): {e}. Retrying in {RETRY_BACKOFF}s...")
+                self._rollback()
+                time.sleep(RETRY_BACKOFF)
+                if self.conn.closed:
+                    try:
+                        self.conn = get_db_connection()
+                    except psycopg2.Error as ce:
+                        print(f"❌ DB Reconnect Failed: {ce}")
+
+        # DB commit succeeded -> now it is safe to advance the consumer group.
+        # Commit exactly what this batch covers, not the consumer's read position.
+        try:
+            consumer.commit(offsets=[TopicPartition(t, p, o + 1) for (t, p), o in self.offsets.items()],
+                            asynchronous=False)
+        except KafkaException as e:
+            # Partitions were reassigned under us (rebalance): the new owner resumes
+            # from the last committed offset, so these rows may be written again.
+            print(f"⚠️ Offset commit failed after rebalance, batch may be redelivered: {e}")
+        print(f"💾 Flushed {len(self.rows) - skipped} rows ({self.pending} msgs, {skipped} rejected) to TimescaleDB")
+        self.rows = []
+        self.pending = 0
+        self.offsets = {}
+        self.opened_at = None
+
+    def close(self):
+        self.conn.close()
+
 def main():
     print("💾 DB Writer Started...")
-    
+
     # Connect to DB
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        writer = BatchWriter()
         print("✅ Connected to Database!")
     except Exception as e:
         print(f"❌ DB Connection Failed: {e}")
         return
 
+    # Compression/retention policies and the 1m/5m/1h OHLCV aggregates (idempotent)
+    try:
+        apply_schema(writer.conn)
+        print("✅ OHLCV aggregates and storage policies in place.")
+    except psycopg2.Error as e:
+        print(f"⚠️ OHLCV schema not applied: {e}")
+
     try:
         while True:
-            # Poll for message (wait 1 second max)
-            msg = consumer.poll(1.0)
+            # Drain up to a full batch per call; wake up in time to honour the age limit
+            msgs = consumer.consume(num_messages=writer.max_rows, timeout=writer.max_age)
 
-            if msg is None:
-                continue
-            if msg.error():
-                print(f"Consumer error: {msg.error()}")
-                continue
+            for msg in msgs:
+                if msg.error():
+                    print(f"Consumer error: {msg.error()}")
+                    continue
+                writer.add(msg)
+                if writer.due():
+                    writer.flush()
 
-            # 4. Parse Data
-            try:
-                data = json.loads(msg.value().decode('utf-8'))
-                
-                # 5. Insert into TimescaleDB
-                # We handle both 'quote' and 'trade' types
-                query = """
-                    INSERT INTO market_candles (time, symbol, price, volume, type)
-                    VALUES (%s, %s, %s, 0, %s);
-                """
-                
-                cur.execute(query, (
-                    data['time'], 
-                    data['symbol'], 
-                    data['price'], 
-                    data['type']
-                ))
-                conn.commit()
-                
-                print(f"💾 Saved: {data['symbol']} @ {data['price']}")
-                
-            except Exception as e:
-                print(f"❌ Insert Error: {e}")
+            if writer.due():
+                writer.flush()
 
     except KeyboardInterrupt:
         pass
     finally:
-        cur.close()
-        conn.close()
+        # Anything buffered but not flushed is simply redelivered on restart
+        writer.close()
         consumer.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
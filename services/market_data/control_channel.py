@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import select
+import threading
+import psycopg2
+from sqlalchemy import text
+
+# --- EVENT-DRIVEN CONTROL CHANNEL ---
+# The dashboard INSERTs a command into apex_commands. A trigger NOTIFYs
+# 'apex_control' on commit, so the engine's listener wakes immediately,
+# applies pending commands strictly in seq order, and acknowledges each one
+# on its row (acked_at / ack_status / ack_detail). LIQUIDATE runs on the
+# listener thread itself, so it never waits for the trading loop.
+# If Postgres is unreachable, both sides fall back to an atomically
+# replaced JSON file.
+CHANNEL = "apex_control"
+CONTROL_FILE = "/app/apex_control.json"
+COMMANDS = ("START", "STOP", "LIQUIDATE")
+COMMAND_MAX_AGE = 120  # seconds: older unacked commands are expired on startup, not executed
+REFRESH_INTERVAL = 30  # Safety-net re-read in case a NOTIFY is missed
+DB_PASS = os.getenv("DB_PASSWORD", "secretpassword")
+
+SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS apex_commands (
+        seq BIGSERIAL PRIMARY KEY,
+        command TEXT NOT NULL CHECK (command IN ('START', 'STOP', 'LIQUIDATE')),
+        issued_by TEXT,
+        issued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        acked_at TIMESTAMPTZ,
+        ack_status TEXT,
+        ack_detail TEXT
+    );
+    CREATE OR REPLACE FUNCTION notify_apex_command() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('apex_control', NEW.seq::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    DROP TRIGGER IF EXISTS apex_commands_notify ON apex_commands;
+    CREATE TRIGGER apex_commands_notify AFTER INSERT ON apex_commands
+        FOR EACH ROW EXECUTE FUNCTION notify_apex_command();
+"""
+
+# The last command that changed the run state. A LIQUIDATE halts entries before it
+# touches the book, so it counts even when the liquidation itself failed (ERROR).
+LAST_APPLIED_SQL = """
+    SELECT seq, command FROM apex_commands
+    WHERE ack_status = 'OK' OR (command = 'LIQUIDATE' AND ack_status = 'ERROR')
+    ORDER BY seq DESC LIMIT 1
+"""
+
+def write_control_file(command, path=CONTROL_FILE):
+    """Fallback channel: tmp + os.replace, so the engine never reads a torn file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"seq": time.time_ns(), "command": command}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# --- DASHBOARD SIDE ---
+def issue_command(engine, command, issued_by="dashboard", wait=2.0):
+    """
+    Queues a command and waits up to `wait` seconds for the engine's ack.
+    Returns (seq, ack_status, ack_detail); ack_status is None if not yet acknowledged.
+    """
+    with engine.begin() as conn:
+        seq = conn.execute(
+            text("INSERT INTO apex_commands (command, issued_by) VALUES (:command, :by) RETURNING seq"),
+            {"command": command, "by": issued_by},
+        ).scalar()
+    deadline = time.monotonic() + wait
+    while True:
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT ack_status, ack_detail FROM apex_commands WHERE seq = :seq"),
+                               {"seq": seq}).fetchone()
+        if row[0] is not None or time.monotonic() >= deadline:
+            return seq, row[0], row[1]
+        time.sleep(0.05)
+
+def current_status(engine):
+    """RUNNING / STOPPED as last applied by the engine."""
+    with engine.connect() as conn:
+        row = conn.execute(text(LAST_APPLIED_SQL)).fetchone()
+    return "RUNNING" if row and row[1] == "START" else "STOPPED"
+
+# --- ENGINE SIDE ---
+class ControlChannel:
+    """Listens for commands and exposes the engine's run state. `changed` is set on every applied command."""
+
+    def __init__(self, on_liquidate, logger, path=CONTROL_FILE):
+        self.on_liquidate = on_liquidate
+        self.log = logger
+        self.path = path
+        self.status = "STOPPED"  # Safe default until the ledger says otherwise
+        self.seq = 0
+        self.file_seq = self._file_state()[0]  # Whatever is on disk at boot is history, not a command
+        self.changed = threading.Event()
+        self.restored = False
+        threading.Thread(target=self._listen, name="control-listener", daemon=True).start()
+
+    def wait(self, timeout):
+        """Sleeps until a command is applied or `timeout` passes."""
+        fired = self.changed.wait(timeout)
+        self.changed.clear()
+        return fired
+
+    def _apply(self, command):
+        if command == "START":
+            self.status = "RUNNING"
+            detail = "Trading engine active."
+        elif command == "STOP":
+            self.status = "STOPPED"
+            detail = "Trading engine paused."
+        else:
+            # Halt entries before touching the book so the loop cannot buy into the liquidation
+            self.status = "STOPPED"
+            detail = self.on_liquidate()
+        self.changed.set()
+        return detail
+
+    def _restore(self, cur):
+        cur.execute(LAST_APPLIED_SQL)
+        row = cur.fetchone()
+        if row:
+            self.seq = row[0]
+            self.status = "RUNNING" if row[1] == "START" else "STOPPED"
+        cur.execute(
+            "UPDATE apex_commands SET acked_at = NOW(), ack_status = 'EXPIRED', "
+            "ack_detail = 'Issued before engine start; not executed.' "
+            "WHERE acked_at IS NULL AND issued_at < NOW() - make_interval(secs => %s);",
+            (COMMAND_MAX_AGE,),
+        )
+        self.changed.set()
+
+    def _drain(self, cur):
+        cur.execute("SELECT seq, command FROM apex_commands WHERE acked_at IS NULL AND seq > %s ORDER BY seq;",
+                    (self.seq,))
+        for seq, command in cur.fetchall():
+            started = time.perf_counter()
+            try:
+                status, detail = "OK", self._apply(command)
+            except Exception as e:
+                status, detail = "ERROR", str(e)
+            cur.execute("UPDATE apex_commands SET acked_at = NOW(), ack_status = %s, ack_detail = %s WHERE seq = %s;",
+                        (status, detail, seq))
+            self.seq = seq
+            level = "CRITICAL" if command == "LIQUIDATE" else "INFO"
+            self.log.log(level, "control", f"🎛️ [CONTROL] #{seq} {command} -> {status} "
+                         f"({(time.perf_counter() - started) * 1000:.0f} ms)",
+                         seq=seq, command=command, ack=status)
+
+    def _file_state(self):
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+            return state.get("seq", 0), state.get("command")
+        except (OSError, ValueError):
+            return 0, None
+
+    def _poll_file(self):
+        """Fallback while Postgres is down: apply a newer command written by the dashboard."""
+        seq, command = self._file_state()
+        if seq > self.file_seq and command in COMMANDS:
+            self.file_seq = seq
+            self.log.warning("control", f"🎛️ [CONTROL] {command} received via fallback file.", command=command)
+            try:
+                self._apply(command)
+            except Exception as e:
+                self.log.error("control", f"⚠️ [CONTROL] {command} failed: {e}", command=command)
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(host="sentient_db", database="sentient_alpha", user="admin", password=DB_PASS)
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute(SCHEMA_SQL)
+                cursor.execute(f"LISTEN {CHANNEL};")
+                if not self.restored:
+                    # First connection only: later reconnects must not undo a fallback STOP
+                    self._restore(cursor)
+                    self.restored = True
+                self._drain(cursor)
+                while True:
+                    # Sleep on the socket: wakes the instant a command commits
+                    select.select([conn], [], [], REFRESH_INTERVAL)
+                    conn.poll()
+                    conn.notifies.clear()
+                    self._drain(cursor)
+            except Exception as e:
+                self.log.warning("control", f"⚠️ Control Channel Error: {e}. Watching {self.path} meanwhile.")
+                if conn is not None:
+                    conn.close()
+                for _ in range(10):
+                    self._poll_file()
+                    time.sleep(1)
@@ -0,0 +1,30 @@
+import numpy as np
+
+# --- SHAPE-PRESERVING DOWNSAMPLING ---
+# Largest-Triangle-Three-Buckets (Steinarsson, 2013). Keeps the first and last
+# points and, from each of n-2 equal buckets in between, the point forming
+# the largest triangle with the previous pick and the next bucket's mean.
+# Spikes and reversals survive, unlike plain striding or averaging.
+
+def lttb(x, y, n_out):
+    """Indices of the n_out points LTTB keeps from (x, y). x must be ascending."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out-2 buckets over the interior
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Next bucket's centroid (the final point for the last bucket)
+        nlo, nhi = (edges[b + 1], edges[b + 2]) if b + 2 < len(edges) else (n - 1, n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        # Twice the triangle area for every candidate in the bucket at once
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+    return keep
@@ -0,0 +1,414 @@
+import math
+from collections import deque
+
+import numpy as np
+
+NAN = float("nan")
+
+# --- STREAMING PRIMITIVES ---
+# Each primitive replays the exact recurrence pandas uses internally
+# (window/aggregations.pyx), so a bar pushed through here yields the same
+# float as the full `ewm`/`rolling` recompute over the whole frame.
+
+class _EWM:
+    """Incremental twin of Series.ewm(...).mean() with ignore_na=False."""
+    __slots__ = ("alpha", "adjust", "min_periods", "weighted", "old_wt", "nobs")
+
+    def __init__(self, alpha, adjust=True, min_periods=0):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    @classmethod
+    def from_span(cls, span, **kwargs):
+        return cls(2.0 / (span + 1.0), **kwargs)
+
+    @classmethod
+    def from_com(cls, com, **kwargs):
+        return cls(1.0 / (1.0 + com), **kwargs)
+
+    def _next(self, value):
+        weighted, old_wt, nobs = self.weighted, self.old_wt, self.nobs
+        is_obs = value == value
+        nobs += is_obs
+        if weighted == weighted:
+            old_wt *= 1.0 - self.alpha
+            if is_obs:
+                new_wt = 1.0 if self.adjust else self.alpha
+                if weighted != value:
+                    weighted = ((old_wt * weighted) + (new_wt * value)) / (old_wt + new_wt)
+                old_wt = old_wt + new_wt if self.adjust else 1.0
+        elif is_obs:
+            weighted = value
+        return weighted, old_wt, nobs
+
+    def _output(self, weighted, nobs):
+        return weighted if nobs >= self.min_periods else NAN
+
+    @property
+    def value(self):
+        return self._output(self.weighted, self.nobs)
+
+    def update(self, value):
+        self.weighted, self.old_wt, self.nobs = self._next(value)
+        return self.value
+
+    def peek(self, value):
+        weighted, _, nobs = self._next(value)
+        return self._output(weighted, nobs)
+
+
+class _RollingMean:
+    """Incremental twin of Series.rolling(window).mean() (Kahan-compensated)."""
+    __slots__ = ("window", "values", "sum_x", "comp_add", "comp_remove",
+                 "nobs", "neg_ct", "same_ct", "prev_value")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.nobs = 0
+        self.neg_ct = 0
+        self.same_ct = 0
+        self.prev_value = NAN
+
+    def _next(self, value):
+        sum_x, comp_add, comp_remove = self.sum_x, self.comp_add, self.comp_remove
+        nobs, neg_ct, same_ct, prev_value = self.nobs, self.neg_ct, self.same_ct, self.prev_value
+
+        # Evict the bar falling out of the window before adding the new one
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_remove
+                t = sum_x + y
+                comp_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+
+        if value == value:
+            nobs += 1
+            y = value - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            same_ct = same_ct + 1 if value == prev_value else 1
+            prev_value = value
+
+        return sum_x, comp_add, comp_remove, nobs, neg_ct, same_ct, prev_value
+
+    def _output(self, sum_x, nobs, neg_ct, same_ct, prev_value):
+        if nobs < self.window or nobs == 0:
+            return NAN
+        if same_ct >= nobs:
+            return prev_value
+        result = sum_x / nobs
+        if neg_ct == 0 and result < 0:
+            return 0.0
+        if neg_ct == nobs and result > 0:
+            return 0.0
+        return result
+
+    @property
+    def value(self):
+        return self._output(self.sum_x, self.nobs, self.neg_ct, self.same_ct, self.prev_value)
+
+    def update(self, value):
+        (self.sum_x, self.comp_add, self.comp_remove,
+         self.nobs, self.neg_ct, self.same_ct, self.prev_value) = self._next(value)
+        if len(self.values) == self.window:
+            self.values.popleft()
+        self.values.append(value)
+        return self.value
+
+    def peek(self, value):
+        sum_x, _, _, nobs, neg_ct, same_ct, prev_value = self._next(value)
+        return self._output(sum_x, nobs, neg_ct, same_ct, prev_value)
+
+
+def rsi_series(close, period=14):
+    """
+    Frame-level RSI over a pandas Series: Wilder smoothing as ewm(com=period-1,
+    min_periods=period). The definition the streaming engines replay, shared
+    by the strategy, the backtest and the dashboard chart.
+    """
+    delta = close.diff()
+    gain = delta.clip(lower=0).fillna(0)
+    loss = -delta.clip(upper=0).fillna(0)
+    avg_gain = gain.ewm(com=period - 1, min_periods=period).mean()
+    avg_loss = loss.ewm(com=period - 1, min_periods=period).mean()
+    return 100 - (100 / (1 + (avg_gain / avg_loss)))
+
+def _rsi(avg_gain, avg_loss):
+    if avg_loss == 0:
+        if avg_gain > 0:
+            return 100.0
+        return NAN
+    return 100 - (100 / (1 + (avg_gain / avg_loss)))
+
+
+# --- THE STREAMING QUANT ENGINE ---
+class StreamingIndicators:
+    """
+    O(1)-per-bar RSI / MACD / ATR / 200-SMA.
+    update() commits a closed bar, peek() scores a forming bar (live tick)
+    without touching state. Both return the same keys as a
+    QuantEngine.calculate_indicators() row.
+    """
+
+    def __init__(self, rsi_period=14, macd_fast=12, macd_slow=26, macd_signal=9,
+                 atr_period=14, sma_period=200):
+        self.avg_gain = _EWM.from_com(rsi_period - 1, min_periods=rsi_period)
+        self.avg_loss = _EWM.from_com(rsi_period - 1, min_periods=rsi_period)
+        self.ema_fast = _EWM.from_span(macd_fast, adjust=False)
+        self.ema_slow = _EWM.from_span(macd_slow, adjust=False)
+        self.signal = _EWM.from_span(macd_signal, adjust=False)
+        self.atr = _RollingMean(atr_period)
+        self.sma = _RollingMean(sma_period)
+        self.sma_period = sma_period
+        self.prev_close = NAN
+        self.bars = 0
+        self.latest = None
+
+    @property
+    def ready(self):
+        """True once the 200-SMA (the longest lookback) is populated."""
+        return self.bars >= self.sma_period
+
+    def _step(self, close, commit):
+        delta = close - self.prev_close
+        if delta == delta:
+            gain, loss, tr = max(delta, 0.0), -min(delta, 0.0), abs(delta)
+        else:
+            gain, loss, tr = 0.0, 0.0, NAN
+
+        op = "update" if commit else "peek"
+        avg_gain = getattr(self.avg_gain, op)(gain)
+        avg_loss = getattr(self.avg_loss, op)(loss)
+        ema_fast = getattr(self.ema_fast, op)(close)
+        ema_slow = getattr(self.ema_slow, op)(close)
+        macd = ema_fast - ema_slow
+        signal = getattr(self.signal, op)(macd)
+        atr = getattr(self.atr, op)(tr)
+        sma_200 = getattr(self.sma, op)(close)
+
+        return {
+            "close": close, "rsi": _rsi(avg_gain, avg_loss),
+            "ema_fast": ema_fast, "ema_slow": ema_slow,
+            "macd": macd, "signal": signal,
+            "tr": tr, "atr": atr, "sma_200": sma_200,
+        }
+
+    def update(self, close):
+        close = float(close)
+        self.latest = self._step(close, commit=True)
+        self.prev_close = close
+        self.bars += 1
+        return self.latest
+
+    def peek(self, close):
+        return self._step(float(close), commit=False)
+
+    def seed(self, closes):
+        for close in closes:
+            self.update(close)
+        return self.latest
+
+
+# --- VECTORIZED (MULTI-SYMBOL) PRIMITIVES ---
+# Same recurrences as above, applied element-wise to one value per symbol.
+# A new bar for the whole universe is a handful of NumPy ops, so cycle
+# time barely moves as symbols are added.
+
+class _VecEWM:
+    def __init__(self, n, alpha, adjust=True, min_periods=0):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = np.full(n, NAN)
+        self.old_wt = np.ones(n)
+        self.nobs = np.zeros(n, dtype=np.int64)
+
+    @classmethod
+    def from_span(cls, n, span, **kwargs):
+        return cls(n, 2.0 / (span + 1.0), **kwargs)
+
+    @classmethod
+    def from_com(cls, n, com, **kwargs):
+        return cls(n, 1.0 / (1.0 + com), **kwargs)
+
+    def _next(self, values):
+        weighted, old_wt = self.weighted, self.old_wt
+        is_obs = values == values
+        nobs = self.nobs + is_obs
+        started = weighted == weighted
+        new_wt = 1.0 if self.adjust else self.alpha
+
+        decayed = np.where(started, old_wt * (1.0 - self.alpha), old_wt)
+        with np.errstate(invalid="ignore"):
+            blended = np.where(weighted != values,
+                               ((decayed * weighted) + (new_wt * values)) / (decayed + new_wt),
+                               weighted)
+        blend = started & is_obs
+        weighted = np.where(blend, blended, np.where(~started & is_obs, values, weighted))
+        old_wt = np.where(blend, decayed + new_wt if self.adjust else 1.0, decayed)
+        return weighted, old_wt, nobs
+
+    def _output(self, weighted, nobs):
+        return np.where(nobs >= self.min_periods, weighted, NAN)
+
+    @property
+    def value(self):
+        return self._output(self.weighted, self.nobs)
+
+    def update(self, values):
+        self.weighted, self.old_wt, self.nobs = self._next(values)
+        return self.value
+
+    def peek(self, values):
+        weighted, _, nobs = self._next(values)
+        return self._output(weighted, nobs)
+
+
+class _VecRollingMean:
+    def __init__(self, n, window):
+        self.window = window
+        self.buf = np.full((n, window), NAN)  # symbols x window, written round-robin
+        self.pos = 0
+        self.filled = 0
+        self.sum_x = np.zeros(n)
+        self.comp_add = np.zeros(n)
+        self.comp_remove = np.zeros(n)
+        self.nobs = np.zeros(n, dtype=np.int64)
+        self.neg_ct = np.zeros(n, dtype=np.int64)
+        self.same_ct = np.zeros(n, dtype=np.int64)
+        self.prev_value = np.full(n, NAN)
+
+    def _next(self, values):
+        sum_x, comp_add, comp_remove = self.sum_x, self.comp_add, self.comp_remove
+        nobs, neg_ct = self.nobs, self.neg_ct
+
+        if self.filled == self.window:
+            old = self.buf[:, self.pos]
+            live = old == old
+            y = -old - comp_remove
+            t = sum_x + y
+            comp_remove = np.where(live, t - sum_x - y, comp_remove)
+            sum_x = np.where(live, t, sum_x)
+            nobs = nobs - live
+            neg_ct = neg_ct - (live & np.signbit(old))
+
+        obs = values == values
+        y = values - comp_add
+        t = sum_x + y
+        comp_add = np.where(obs, t - sum_x - y, comp_add)
+        sum_x = np.where(obs, t, sum_x)
+        nobs = nobs + obs
+        neg_ct = neg_ct + (obs & np.signbit(values))
+        same_ct = np.where(obs, np.where(values == self.prev_value, self.same_ct + 1, 1), self.same_ct)
+        prev_value = np.where(obs, values, self.prev_value)
+        return sum_x, comp_add, comp_remove, nobs, neg_ct, same_ct, prev_value
+
+    def _output(self, sum_x, nobs, neg_ct, same_ct, prev_value):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result = sum_x / nobs
+        result = np.where((neg_ct == 0) & (result < 0), 0.0, result)
+        result = np.where((neg_ct == nobs) & (result > 0), 0.0, result)
+        result = np.where(same_ct >= nobs, prev_value, result)
+        return np.where((nobs >= self.window) & (nobs > 0), result, NAN)
+
+    @property
+    def value(self):
+        return self._output(self.sum_x, self.nobs, self.neg_ct, self.same_ct, self.prev_value)
+
+    def update(self, values):
+        (self.sum_x, self.comp_add, self.comp_remove,
+         self.nobs, self.neg_ct, self.same_ct, self.prev_value) = self._next(values)
+        self.buf[:, self.pos] = values
+        self.pos = (self.pos + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+        return self.value
+
+    def peek(self, values):
+        sum_x, _, _, nobs, neg_ct, same_ct, prev_value = self._next(values)
+        return self._output(sum_x, nobs, neg_ct, same_ct, prev_value)
+
+
+def _vec_rsi(avg_gain, avg_loss):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100 - (100 / (1 + (avg_gain / avg_loss)))
+
+
+class VectorIndicators:
+    """
+    StreamingIndicators for a whole universe at once: update()/peek() take
+    one close per symbol and return a dict of per-symbol arrays.
+    """
+
+    def __init__(self, n_symbols, rsi_period=14, macd_fast=12, macd_slow=26, macd_signal=9,
+                 atr_period=14, sma_period=200):
+        n = n_symbols
+        self.n_symbols = n
+        self.avg_gain = _VecEWM.from_com(n, rsi_period - 1, min_periods=rsi_period)
+        self.avg_loss = _VecEWM.from_com(n, rsi_period - 1, min_periods=rsi_period)
+        self.ema_fast = _VecEWM.from_span(n, macd_fast, adjust=False)
+        self.ema_slow = _VecEWM.from_span(n, macd_slow, adjust=False)
+        self.signal = _VecEWM.from_span(n, macd_signal, adjust=False)
+        self.atr = _VecRollingMean(n, atr_period)
+        self.sma = _VecRollingMean(n, sma_period)
+        self.sma_period = sma_period
+        self.prev_close = np.full(n, NAN)
+        self.bars = 0
+        self.latest = None
+
+    @property
+    def ready(self):
+        return self.bars >= self.sma_period
+
+    def _step(self, closes, commit):
+        delta = closes - self.prev_close
+        known = delta == delta
+        gain = np.where(known, np.maximum(delta, 0.0), 0.0)
+        loss = np.where(known, -np.minimum(delta, 0.0), 0.0)
+        tr = np.abs(delta)
+
+        op = "update" if commit else "peek"
+        avg_gain = getattr(self.avg_gain, op)(gain)
+        avg_loss = getattr(self.avg_loss, op)(loss)
+        ema_fast = getattr(self.ema_fast, op)(closes)
+        ema_slow = getattr(self.ema_slow, op)(closes)
+        macd = ema_fast - ema_slow
+        signal = getattr(self.signal, op)(macd)
+
+        return {
+            "close": closes, "rsi": _vec_rsi(avg_gain, avg_loss),
+            "ema_fast": ema_fast, "ema_slow": ema_slow,
+            "macd": macd, "signal": signal,
+            "tr": tr, "atr": getattr(self.atr, op)(tr),
+            "sma_200": getattr(self.sma, op)(closes),
+        }
+
+    def update(self, closes):
+        closes = np.asarray(closes, dtype=np.float64)
+        self.latest = self._step(closes, commit=True)
+        self.prev_close = closes
+        self.bars += 1
+        return self.latest
+
+    def peek(self, closes):
+        return self._step(np.asarray(closes, dtype=np.float64), commit=False)
+
+    def seed(self, closes_2d):
+        """Replays a (symbols x bars) close matrix column by column."""
+        for column in np.asarray(closes_2d, dtype=np.float64).T:
+            self.update(column)
+        return self.latest
@@ -0,0 +1,47 @@
+import os
+
+# --- SHARED LOG FILE HELPERS ---
+# The trading engine appends to the log and the dashboard tails it. Both
+# sides only ever touch the end of the file, so their cost does not grow
+# with the size of the log.
+TAIL_BLOCK = 8192
+
+def rotate_file(path, backups=3):
+    """Shifts path -> path.1 -> ... -> path.<backups>, dropping the oldest."""
+    for i in range(backups - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    if os.path.exists(path):
+        if backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+def _tail_one(path, n):
+    """Last n lines of a single file, reading backwards block by block from EOF."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        # n lines need n+1 newlines before them (the final line may lack its own)
+        while pos > 0 and data.count(b"\n") <= n:
+            step = min(TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    return lines[-n:] if n > 0 else []
+
+def tail_lines(path, n=15):
+    """
+    Last n lines of a rotated log. Falls back to path.1 when the live file was
+    just rotated and holds fewer than n lines. Returns [] if nothing exists.
+    """
+    lines = []
+    for candidate in (path, f"{path}.1"):
+        if len(lines) >= n:
+            break
+        if os.path.exists(candidate):
+            lines = _tail_one(candidate, n - len(lines)) + lines
+    return lines
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+
+# --- IN-PROCESS STAGE METRICS ---
+# Recording is a perf_counter pair, a lock and a deque append (a few us).
+# Each stage keeps a rolling window of recent samples; quantiles are only
+# computed when someone scrapes /metrics (Prometheus text) or
+# /metrics.json (dashboard).
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+WINDOW = 1024                 # Samples per stage behind p50/p95/p99
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Metrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.stages = {}    # stage -> [deque of seconds, count, sum, max]
+        self.counters = {}  # (name, ((label, value), ...)) -> value
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = [deque(maxlen=self.window), 0, 0.0, 0.0]
+            entry[0].append(seconds)
+            entry[1] += 1
+            entry[2] += seconds
+            entry[3] = max(entry[3], seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """with metrics.timer("klines"): ... -- records even if the block raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def call(self, stage, fn, *args, **kwargs):
+        """Times a single call, e.g. metrics.call("alpaca_order", api.submit_order, ...)."""
+        with self.timer(stage):
+            return fn(*args, **kwargs)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        """{"stages": {stage: {count, sum, max, p50, p95, p99}}, "counters": [...]} in seconds."""
+        with self.lock:
+            stages = {s: (np.array(e[0]), e[1], e[2], e[3]) for s, e in self.stages.items()}
+            counters = dict(self.counters)
+        out = {"uptime": time.time() - self.started, "stages": {}, "counters": []}
+        for stage, (samples, count, total, peak) in sorted(stages.items()):
+            qs = np.quantile(samples, QUANTILES) if len(samples) else [0.0] * len(QUANTILES)
+            out["stages"][stage] = {"count": count, "sum": total, "max": peak,
+                                    **{f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, qs)}}
+        for (name, labels), value in sorted(counters.items()):
+            out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+        return out
+
+    def prometheus(self):
+        snap = self.snapshot()
+        lines = [
+            f"# HELP apex_stage_latency_seconds Trading loop stage latency over the last {self.window} samples.",
+            "# TYPE apex_stage_latency_seconds summary",
+        ]
+        for stage, s in snap["stages"].items():
+            for q in QUANTILES:
+                lines.append(f'apex_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {s[f"p{int(q * 100)}"]:.9g}')
+            lines.append(f'apex_stage_latency_seconds_sum{{stage="{stage}"}} {s["sum"]:.9g}')
+            lines.append(f'apex_stage_latency_seconds_count{{stage="{stage}"}} {s["count"]}')
+        typed = set()
+        for c in snap["counters"]:
+            metric = f"apex_{c['name']}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            labels = ",".join(f'{k}="{v}"' for k, v in c["labels"].items())
+            lines.append(f"{metric}{{{labels}}} {c['value']}" if labels else f"{metric} {c['value']}")
+        lines.append("# TYPE apex_uptime_seconds gauge")
+        lines.append(f"apex_uptime_seconds {snap['uptime']:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry, like prometheus_client's default
+METRICS = Metrics()
+timer = METRICS.timer
+call = METRICS.call
+observe = METRICS.observe
+inc = METRICS.inc
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def _reply(self, body, content_type):
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._reply(self.registry.prometheus(), "text/plain; version=0.0.4")
+        elif self.path == "/metrics.json":
+            self._reply(json.dumps(self.registry.snapshot()), "application/json")
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass  # Scrapes every few seconds would drown the telemetry feed
+
+def serve(port=METRICS_PORT, host="0.0.0.0"):
+    """Starts the metrics endpoint on a daemon thread."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
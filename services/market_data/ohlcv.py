@@ -0,0 +1,145 @@
+import os
+import argparse
+import pandas as pd
+from sqlalchemy import text
+
+# --- TIMESCALEDB OHLCV LAYER ---
+# market_candles holds raw quotes. This module owns the storage policy for
+# them (hypertable chunking, native compression, retention) and the
+# continuous aggregates that materialize 1m -> 5m -> 1h OHLCV bars, plus a
+# reader so the strategy, dashboard and backtest pull pre-aggregated bars
+# instead of scanning quotes. Every statement is idempotent: consumer.py (the
+# market_consumer service, which writes market_candles) and strategy.py (the
+# market_writer service) apply them on start, 'python ohlcv.py' does the
+# same by hand, and scripts/init_db.sql mirrors them for fresh volumes.
+RAW_RETENTION = os.getenv("QUOTE_RETENTION", "30 days")
+BAR_VIEWS = {"1m": "market_bars_1m", "5m": "market_bars_5m", "1h": "market_bars_1h"}
+
+SCHEMA_SQL = [
+    # 1. Raw quotes: daily chunks, compressed per symbol once they are a day old
+    "SELECT create_hypertable('market_candles', 'time', if_not_exists => TRUE);",
+    "SELECT set_chunk_time_interval('market_candles', INTERVAL '1 day');",
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM timescaledb_information.hypertables
+                       WHERE hypertable_name = 'market_candles' AND compression_enabled) THEN
+            ALTER TABLE market_candles SET (timescaledb.compress,
+                timescaledb.compress_segmentby = 'symbol', timescaledb.compress_orderby = 'time DESC');
+        END IF;
+    END $$;
+    """,
+    "SELECT add_compression_policy('market_candles', INTERVAL '1 day', if_not_exists => TRUE);",
+
+    # 2. Continuous aggregates. Quotes carry no size, so ticks is the activity measure;
+    #    volume sums whatever the feed provides. materialized_only = false serves the
+    #    still-forming bucket from raw rows in real time.
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS market_bars_1m
+    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+    SELECT time_bucket('1 minute', time) AS bucket, symbol,
+           first(price, time) AS open, max(price) AS high, min(price) AS low,
+           last(price, time) AS close, sum(volume) AS volume, count(*) AS ticks
+    FROM market_candles
+    GROUP BY bucket, symbol
+    WITH NO DATA;
+    """,
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS market_bars_5m
+    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+    SELECT time_bucket('5 minutes', bucket) AS bucket, symbol,
+           first(open, bucket) AS open, max(high) AS high, min(low) AS low,
+           last(close, bucket) AS close, sum(volume) AS volume, sum(ticks) AS ticks
+    FROM market_bars_1m
+    GROUP BY 1, symbol
+    WITH NO DATA;
+    """,
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS market_bars_1h
+    WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+    SELECT time_bucket('1 hour', bucket) AS bucket, symbol,
+           first(open, bucket) AS open, max(high) AS high, min(low) AS low,
+           last(close, bucket) AS close, sum(volume) AS volume, sum(ticks) AS ticks
+    FROM market_bars_5m
+    GROUP BY 1, symbol
+    WITH NO DATA;
+    """,
+    """SELECT add_continuous_aggregate_policy('market_bars_1m', start_offset => INTERVAL '1 hour',
+        end_offset => INTERVAL '1 minute', schedule_interval => INTERVAL '1 minute', if_not_exists => TRUE);""",
+    """SELECT add_continuous_aggregate_policy('market_bars_5m', start_offset => INTERVAL '6 hours',
+        end_offset => INTERVAL '5 minutes', schedule_interval => INTERVAL '5 minutes', if_not_exists => TRUE);""",
+    """SELECT add_continuous_aggregate_policy('market_bars_1h', start_offset => INTERVAL '3 days',
+        end_offset => INTERVAL '1 hour', schedule_interval => INTERVAL '30 minutes', if_not_exists => TRUE);""",
+
+    # 3. Compress materialized bars well behind their refresh windows
+    """
+    DO $$
+    DECLARE v TEXT;
+    BEGIN
+        FOREACH v IN ARRAY ARRAY['market_bars_1m', 'market_bars_5m', 'market_bars_1h'] LOOP
+            IF NOT EXISTS (SELECT 1 FROM timescaledb_information.continuous_aggregates
+                           WHERE view_name = v AND compression_enabled) THEN
+                EXECUTE format('ALTER MATERIALIZED VIEW %I SET (timescaledb.compress = true)', v);
+            END IF;
+        END LOOP;
+    END $$;
+    """,
+    "SELECT add_compression_policy('market_bars_1m', compress_after => INTERVAL '7 days', if_not_exists => TRUE);",
+    "SELECT add_compression_policy('market_bars_5m', compress_after => INTERVAL '30 days', if_not_exists => TRUE);",
+    "SELECT add_compression_policy('market_bars_1h', compress_after => INTERVAL '90 days', if_not_exists => TRUE);",
+
+    # 4. Retention: raw quotes go first; coarser bars live longer (1h bars are kept)
+    "SELECT add_retention_policy('market_candles', CAST(%(raw_retention)s AS INTERVAL), if_not_exists => TRUE);",
+    "SELECT add_retention_policy('market_bars_1m', INTERVAL '180 days', if_not_exists => TRUE);",
+    "SELECT add_retention_policy('market_bars_5m', INTERVAL '2 years', if_not_exists => TRUE);",
+]
+
+def apply_schema(conn, raw_retention=RAW_RETENTION):
+    """Runs SCHEMA_SQL on a psycopg2 connection. Continuous aggregates cannot be created in a transaction."""
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for statement in SCHEMA_SQL:
+                cur.execute(statement, {"raw_retention": raw_retention} if "%(" in statement else None)
+    finally:
+        conn.autocommit = autocommit
+
+def load_bars(engine, symbol, timeframe="1m", limit=None, since=None):
+    """
+    OHLCV bars for one symbol from the continuous aggregate, oldest first.
+    Columns: time (epoch ms), open, high, low, close, volume, ticks.
+    """
+    view = BAR_VIEWS[timeframe]
+    where = "symbol = :symbol" + (" AND bucket >= :since" if since is not None else "")
+    # Newest `limit` bars, flipped back to chronological order
+    query = text(f"""
+        SELECT * FROM (
+            SELECT (extract(epoch FROM bucket) * 1000)::bigint AS time,
+                   open, high, low, close, volume, ticks
+            FROM {view} WHERE {where}
+            ORDER BY bucket DESC {"LIMIT :limit" if limit else ""}
+        ) recent ORDER BY time
+    """)
+    params = {"symbol": symbol, "since": since, "limit": limit}
+    return pd.read_sql(query, engine, params=params)
+
+if __name__ == "__main__":
+    import psycopg2
+
+    parser = argparse.ArgumentParser(description="Apply the TimescaleDB compression/retention/OHLCV schema")
+    parser.add_argument("--raw-retention", default=RAW_RETENTION, help="How long raw quotes are kept")
+    parser.add_argument("--backfill", action="store_true", help="Materialize all existing quotes into bars now")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(host=os.getenv("DB_HOST", "timescaledb"), database="sentient_alpha",
+                            user="admin", password=os.getenv("DB_PASSWORD", "secretpassword"))
+    apply_schema(conn, args.raw_retention)
+    print("✅ [OHLCV] Hypertable policies and continuous aggregates are in place.")
+    if args.backfill:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            # Order matters: each tier is built from the one below it
+            for view in BAR_VIEWS.values():
+                print(f"⏳ [OHLCV] Refreshing {view}...")
+                cur.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL);")
+    conn.close()
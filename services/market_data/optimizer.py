@@ -0,0 +1,156 @@
+import os
+import time
+import argparse
+import itertools
+from functools import lru_cache
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+import backtest
+
+# --- SEARCH SPACE ---
+# Indicator periods come first so consecutive grid points share an indicator
+# frame and hit the per-worker cache.
+SEARCH_SPACE = {
+    "rsi_period": [7, 10, 14, 21],
+    "macd_fast": [8, 12, 16],
+    "macd_slow": [21, 26, 34],
+    "macd_signal": [6, 9, 12],
+    "take_profit_pct": [0.01, 0.015, 0.02, 0.03, 0.04],
+    "atr_multiplier": [1.5, 2.0, 2.5, 3.0, 4.0],
+    "position_size": [0.05, 0.10, 0.20],
+}
+INDICATOR_KEYS = ("rsi_period", "macd_fast", "macd_slow", "macd_signal")
+OHLC_COLUMNS = ("open", "high", "low", "close")
+HOURS_PER_YEAR = 24 * 365
+
+# --- 1. PARAMETER GENERATORS ---
+def _is_valid(params):
+    return params["macd_fast"] < params["macd_slow"]
+
+def grid_search(space=SEARCH_SPACE):
+    keys = list(space)
+    for values in itertools.product(*(space[k] for k in keys)):
+        params = dict(zip(keys, values))
+        if _is_valid(params):
+            yield params
+
+def random_search(n_samples, seed, space=SEARCH_SPACE):
+    """Seeded draw of unique grid points, so the same seed replays the same sweep."""
+    rng = np.random.default_rng(seed)
+    keys = list(space)
+    seen = set()
+    max_unique = int(np.prod([len(space[k]) for k in keys]))
+    drawn = 0
+    while drawn < n_samples and len(seen) < max_unique:
+        values = tuple(space[k][rng.integers(len(space[k]))] for k in keys)
+        if values in seen:
+            continue
+        seen.add(values)
+        params = dict(zip(keys, values))
+        if _is_valid(params):
+            drawn += 1
+            yield params
+
+# --- 2. SHARED MEMORY BRIDGE ---
+# The parent writes OHLC once into a (4, n) float64 block; workers attach
+# to it by name instead of receiving a pickled DataFrame per task.
+_shm = None
+_ohlc = None
+
+def _attach(shm_name, n_bars):
+    global _shm, _ohlc
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    arr = np.ndarray((len(OHLC_COLUMNS), n_bars), dtype=np.float64, buffer=_shm.buf)
+    _ohlc = pd.DataFrame({col: pd.Series(arr[i], copy=False) for i, col in enumerate(OHLC_COLUMNS)})
+
+@lru_cache(maxsize=32)
+def _indicator_arrays(rsi_period, macd_fast, macd_slow, macd_signal):
+    df = backtest.calculate_indicators(_ohlc.copy(), rsi_period, macd_fast, macd_slow, macd_signal)
+    return tuple(df[col].values for col in ("close", "rsi", "macd", "signal", "atr", "sma_200"))
+
+# --- 3. SCORING ---
+def score(trades, equity, initial_capital=backtest.INITIAL_CAPITAL):
+    wins = sum(1 for t in trades if t["result"] == "WIN")
+    losses = sum(1 for t in trades if t["result"] == "LOSS")
+    total = wins + losses
+    final_equity = float(equity[-1]) if len(equity) else initial_capital
+
+    peak = np.maximum.accumulate(equity) if len(equity) else np.array([initial_capital])
+    drawdown = float(((equity - peak) / peak).min()) if len(equity) else 0.0
+    returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.array([])
+    std = returns.std()
+    sharpe = float(returns.mean() / std * np.sqrt(HOURS_PER_YEAR)) if std > 0 else 0.0
+
+    return {
+        "final_equity": final_equity,
+        "roi_pct": (final_equity - initial_capital) / initial_capital * 100,
+        "trades": total,
+        "win_rate_pct": (wins / total * 100) if total else 0.0,
+        "max_drawdown_pct": drawdown * 100,
+        "sharpe": sharpe,
+    }
+
+def _evaluate(params):
+    arrays = _indicator_arrays(*(params[k] for k in INDICATOR_KEYS))
+    sim_params = {k: v for k, v in params.items() if k not in INDICATOR_KEYS}
+    trades, equity = backtest.simulate(*arrays, **sim_params)
+    return {**params, **score(trades, equity)}
+
+# --- 4. THE SWEEP ---
+def run_sweep(df, param_sets, workers=None, rank_by="roi_pct", chunksize=16):
+    """Fans param_sets across a process pool and returns a ranked results table."""
+    ohlc = np.ascontiguousarray(df[list(OHLC_COLUMNS)].to_numpy(dtype=np.float64).T)
+    shm = shared_memory.SharedMemory(create=True, size=ohlc.nbytes)
+    try:
+        np.ndarray(ohlc.shape, dtype=ohlc.dtype, buffer=shm.buf)[:] = ohlc
+        with Pool(processes=workers or os.cpu_count(), initializer=_attach,
+                  initargs=(shm.name, ohlc.shape[1])) as pool:
+            # imap keeps submission order, so the table is identical run to run
+            rows = list(pool.imap(_evaluate, param_sets, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    # Ties broken on the parameters themselves for a stable ranking
+    sort_cols = [rank_by] + list(SEARCH_SPACE)
+    ascending = [False] + [True] * len(SEARCH_SPACE)
+    return results.sort_values(sort_cols, ascending=ascending, kind="mergesort").reset_index(drop=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RiverFlow parameter sweep optimizer")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=2000, help="Random-search draws")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="roi_pct",
+                        choices=["roi_pct", "sharpe", "win_rate_pct", "final_equity"])
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", default="optimizer_results.csv")
+    parser.add_argument("--offline", action="store_true", help="Use cached bars only, skip the tail sync")
+    args = parser.parse_args()
+
+    print("💠 RIVERFLOW APEX 4.0: PARAMETER SWEEP OPTIMIZER")
+    df = backtest.load_history(refresh=not args.offline)
+    print(f"✅ Loaded {len(df):,} hours of Bitcoin market data.")
+
+    if args.mode == "grid":
+        param_sets = list(grid_search())
+    else:
+        param_sets = sorted(random_search(args.samples, args.seed),
+                            key=lambda p: tuple(p[k] for k in INDICATOR_KEYS))
+    print(f"⚙️ Sweeping {len(param_sets):,} parameter sets across {args.workers or os.cpu_count()} cores...")
+
+    start = time.perf_counter()
+    results = run_sweep(df, param_sets, workers=args.workers, rank_by=args.rank_by)
+    elapsed = time.perf_counter() - start
+    print(f"⚡ Done in {elapsed:.1f}s ({len(param_sets) / elapsed:,.0f} backtests/s)\n")
+
+    results.to_csv(args.out, index=False)
+    print(results.head(args.top).to_string(index=False))
+    print(f"\n💾 Full ranked table written to {args.out}")
@@ -1,17 +1,32 @@
 import os
-import json
 import asyncio
 from alpaca.data.live import CryptoDataStream
 from confluent_kafka import Producer
 
+import wire
+
 # 1. Config
 ALPACA_KEY = os.getenv('ALPACA_KEY')
 ALPACA_SECRET = os.getenv('ALPACA_SECRET')
 KAFKA_BROKER = os.getenv('KAFKA_BROKER', 'redpanda:9092')
+WIRE_FORMAT = os.getenv('WIRE_FORMAT', 'binary')  # 'binary' (v1) or 'json' (legacy v0)
+SYMBOLS = [s.strip() for s in os.getenv('APEX_SYMBOLS', 'BTC/USD').split(',') if s.strip()]
+POLL_EVERY = 1000  # Serve delivery callbacks every N quotes instead of every quote
+
+codec = wire.get_codec(WIRE_FORMAT)
 
 # 2. Initialize Kafka Producer
-print(f"🔌 Connecting to Kafka at: {KAFKA_BROKER}")
-producer = Producer({'bootstrap.servers': KAFKA_BROKER})
+# Let librdkafka coalesce quotes into compressed batches instead of one request per tick
+print(f"🔌 Connecting to Kafka at: {KAFKA_BROKER} (wire: {codec.name})")
+producer = Producer({
+    'bootstrap.servers': KAFKA_BROKER,
+    'linger.ms': 20,
+    'batch.size': 262144,
+    'batch.num.messages': 10000,
+    'compression.type': 'lz4',
+    'queue.buffering.max.messages': 500000,
+})
+sent = 0
 
 def delivery_report(err, msg):
     if err is not None:
@@ -19,34 +34,44 @@ def delivery_report(err, msg):
 
 # This MUST remain async because Alpaca calls it internally
 async def handle_quote(data):
-    msg = {
+    global sent
+    value = codec.encode({
         "symbol": data.symbol,
-        "price": data.bid_price,
-        "time": str(data.timestamp),
-        "type": "quote"
-    }
-    
+        "ts_ns": wire.to_epoch_ns(data.timestamp),
+        "bid": data.bid_price,
+        "ask": data.ask_price,
+        "bid_size": data.bid_size,
+        "ask_size": data.ask_size,
+        "type": "quote",
+    })
+
     # Send to Kafka
-    producer.produce(
-        'market_trades', 
-        key=msg['symbol'], 
-        value=json.dumps(msg), 
-        callback=delivery_report
-    )
-    producer.poll(0)
+    try:
+        producer.produce('market_trades', key=data.symbol, value=value, callback=delivery_report)
+    except BufferError:
+        # Local queue is full: drain callbacks, then retry once
+        producer.poll(0.5)
+        producer.produce('market_trades', key=data.symbol, value=value, callback=delivery_report)
+
+    sent += 1
+    if sent % POLL_EVERY == 0:
+        producer.poll(0)
 
 # CHANGE 1: Remove 'async' keyword
 def main():
     print("🚀 Starting Production Crypto Stream...")
-    
+
     wss_client = CryptoDataStream(ALPACA_KEY, ALPACA_SECRET)
-    
-    print("✅ Subscribing to BTC/USD Quotes...")
-    wss_client.subscribe_quotes(handle_quote, "BTC/USD")
+
+    print(f"✅ Subscribing to {', '.join(SYMBOLS)} Quotes...")
+    wss_client.subscribe_quotes(handle_quote, *SYMBOLS)
 
     # CHANGE 2: Remove 'await'. This is now a blocking call.
-    wss_client.run()
+    try:
+        wss_client.run()
+    finally:
+        producer.flush(10)
 
 if __name__ == "__main__":
     # CHANGE 3: Remove 'asyncio.run()'. Just call main().
-    main()
\ No newline at end of file
+    main()
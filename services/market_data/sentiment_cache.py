@@ -0,0 +1,105 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# --- HEADLINE SCORE CACHE ---
+# LRU-ordered, TTL-bounded map of normalized-headline hash -> sentiment score.
+# Persisted as a small JSON snapshot so a restart does not re-bill the LLM.
+# Thread-safe: fan_out scores several currencies concurrently on io_pool, and
+# a timed-out call keeps running (and writing) in the background.
+
+def headline_key(headline):
+    """Case/whitespace/punctuation-insensitive hash, so trivially re-formatted repeats still hit."""
+    normalized = re.sub(r"[^\w\s]", "", headline.lower())
+    normalized = " ".join(normalized.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+class SentimentCache:
+    def __init__(self, path=None, max_size=1024, ttl=24 * 3600):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (score, stored_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()       # entries and counters
+        self.save_lock = threading.Lock()  # One snapshot write at a time, newest last
+        self._load()
+
+    def get(self, headline):
+        key = headline_key(headline)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                score, stored_at = entry
+                if time.time() - stored_at < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return score
+                del self.entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, headline, score):
+        key = headline_key(headline)
+        with self.lock:
+            self.entries[key] = (score, time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        self._save()
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    # --- PERSISTENCE ---
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            print(f"⚠️ [SENTIMENT CACHE] Ignoring unreadable snapshot: {e}")
+            return
+        now = time.time()
+        # Snapshot is stored oldest-first, which rebuilds the LRU order as-is
+        for key, score, stored_at in snapshot:
+            if now - stored_at < self.ttl:
+                self.entries[key] = (score, stored_at)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def _save(self):
+        if not self.path:
+            return
+        with self.save_lock:
+            # Copy under the lock; serialize and write outside it so readers never wait on disk
+            with self.lock:
+                snapshot = [[k, s, t] for k, (s, t) in self.entries.items()]
+            tmp = None
+            try:
+                with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(self.path) or ".",
+                                                 prefix=os.path.basename(self.path) + ".",
+                                                 suffix=".tmp", delete=False) as f:
+                    tmp = f.name
+                    json.dump(snapshot, f)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                print(f"⚠️ [SENTIMENT CACHE] Snapshot write failed: {e}")
+                if tmp is not None and os.path.exists(tmp):
+                    os.remove(tmp)
@@ -0,0 +1,79 @@
+import os
+import json
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from audit_writer import AuditWriter
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE execution_audit (
+                time TEXT, symbol TEXT, action TEXT, price REAL CHECK (price > 0),
+                rsi REAL, macd REAL, sma_200 REAL, ai_score REAL, rag_reasoning TEXT)
+        """))
+    return engine
+
+def record(symbol, price):
+    return dict(symbol=symbol, action="BUY", price=price, rsi=30.0, macd=0.1,
+                sma_200=100.0, ai_score=0.5, rag_reasoning="clear")
+
+def audited(engine):
+    with engine.connect() as conn:
+        return [r[0] for r in conn.execute(text("SELECT symbol FROM execution_audit ORDER BY rowid"))]
+
+def read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_of_the_batch_lands(tmp_path):
+    engine = make_engine(tmp_path / "audit.db")
+    writer = AuditWriter(engine, spill_path=str(tmp_path / "spill.ndjson"),
+                         reject_path=str(tmp_path / "rejected.ndjson"), flush_interval=0.05)
+    for symbol, price in (("BTC/USD", 60000.0), ("BAD/USD", -1.0), ("ETH/USD", 3000.0)):
+        writer.submit(**record(symbol, price))
+    writer.close()
+
+    assert audited(engine) == ["BTC/USD", "ETH/USD"]
+    rejected = read_ndjson(tmp_path / "rejected.ndjson")
+    assert [r["symbol"] for r in rejected] == ["BAD/USD"]
+    assert "CHECK" in rejected[0]["audit_error"]
+    assert not os.path.exists(tmp_path / "spill.ndjson")
+    assert writer.db_ok
+
+def test_spill_with_a_bad_row_replays_instead_of_wedging(tmp_path):
+    engine = make_engine(tmp_path / "audit.db")
+    spill = tmp_path / "spill.ndjson"
+    # Left behind by an outage: one of the spilled rows violates the constraint
+    with open(spill, "w", encoding="utf-8") as f:
+        for symbol, price in (("BTC/USD", 60000.0), ("BAD/USD", 0.0)):
+            f.write(json.dumps(dict(record(symbol, price), time="2026-01-01T00:00:00+00:00")) + "\n")
+    writer = AuditWriter(engine, spill_path=str(spill), reject_path=str(tmp_path / "rejected.ndjson"),
+                         flush_interval=0.05)
+    writer.submit(**record("SOL/USD", 150.0))
+    writer.close()
+
+    assert audited(engine) == ["BTC/USD", "SOL/USD"]
+    assert [r["symbol"] for r in read_ndjson(tmp_path / "rejected.ndjson")] == ["BAD/USD"]
+    assert not os.path.exists(spill)
+    assert not os.path.exists(str(spill) + ".replaying")
+
+def test_connection_errors_spill_instead_of_dead_lettering(tmp_path):
+    engine = make_engine(tmp_path / "audit.db")
+
+    class DownWriter(AuditWriter):
+        def _insert(self, batch):
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+    writer = DownWriter(engine, spill_path=str(tmp_path / "spill.ndjson"),
+                        reject_path=str(tmp_path / "rejected.ndjson"), flush_interval=0.05)
+    writer.submit(**record("BTC/USD", 60000.0))
+    writer.close()
+
+    assert [r["symbol"] for r in read_ndjson(tmp_path / "spill.ndjson")] == ["BTC/USD"]
+    assert not os.path.exists(tmp_path / "rejected.ndjson")
+    assert not writer.db_ok
@@ -0,0 +1,122 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from broker_state import BrokerMirror, LocalTradeStream, SnapshotREST
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def log(self, level, event, msg, **fields):
+        self.records.append((level, event, msg))
+
+    def info(self, event, msg, **fields):
+        self.log("INFO", event, msg, **fields)
+
+    def warning(self, event, msg, **fields):
+        self.log("WARNING", event, msg, **fields)
+
+    def error(self, event, msg, **fields):
+        self.log("ERROR", event, msg, **fields)
+
+
+def make_mirror(cash=100000.0, positions=(), orders=()):
+    stream = LocalTradeStream()
+    mirror = BrokerMirror(SnapshotREST(cash, positions, orders), lambda: stream, RecordingLogger(),
+                          reconcile_interval=3600)
+    assert mirror.sync()
+    return mirror, stream
+
+def replay(mirror, stream, *updates):
+    """Delivers updates through the stream's run() on this thread, in order."""
+    stream.subscribe_trade_updates(mirror._on_update)
+    for update in updates:
+        stream.push(*update)
+    stream.stop()
+    stream.run()
+
+def order(order_id, symbol, side, qty):
+    return SimpleNamespace(id=order_id, symbol=symbol, side=side, qty=qty)
+
+
+def test_partial_fill_then_fill_builds_vwap_and_debits_cash():
+    mirror, stream = make_mirror()
+    replay(mirror, stream,
+           ("new", "o-1", "BTC/USD", "buy", 0.1),
+           ("partial_fill", "o-1", "BTC/USD", "buy", 0.1, 60000.0, 0.04, 0.04))
+    held = mirror.position("BTC/USD")
+    assert held.qty == pytest.approx(0.04)
+    assert held.avg_entry_price == pytest.approx(60000.0)
+    assert "o-1" in mirror.orders
+
+    replay(mirror, stream, ("fill", "o-1", "BTC/USD", "buy", 0.1, 60500.0, 0.06, 0.1))
+    held = mirror.position("BTCUSD")
+    assert held.qty == pytest.approx(0.1)
+    assert held.avg_entry_price == pytest.approx((0.04 * 60000.0 + 0.06 * 60500.0) / 0.1)
+    assert mirror.cash == pytest.approx(100000.0 - 0.04 * 60000.0 - 0.06 * 60500.0)
+    assert "o-1" not in mirror.orders
+
+def test_sell_to_zero_removes_position_and_credits_cash():
+    mirror, stream = make_mirror(cash=1000.0, positions=[("ETHUSD", 2.0, 3000.0)])
+    replay(mirror, stream, ("fill", "o-2", "ETH/USD", "sell", 2.0, 3100.0, 2.0, 0.0))
+    assert mirror.position("ETHUSD") is None
+    assert mirror.positions() == []
+    assert mirror.cash == pytest.approx(1000.0 + 2.0 * 3100.0)
+
+def test_track_after_fill_does_not_reserve_cash():
+    mirror, stream = make_mirror()
+    replay(mirror, stream, ("fill", "o-3", "BTC/USD", "buy", 0.1, 60000.0, 0.1, 0.1))
+    # The REST submit_order call returns after the stream already reported the fill
+    mirror.track(order("o-3", "BTC/USD", "buy", 0.1), 60000.0)
+    assert "o-3" not in mirror.orders
+    assert mirror.spendable() == pytest.approx(mirror.cash)
+    assert mirror.cash == pytest.approx(100000.0 - 6000.0)
+
+def test_spendable_subtracts_open_buy_reserves():
+    mirror, stream = make_mirror()
+    mirror.track(order("o-4", "BTC/USD", "buy", 0.1), 60000.0)
+    mirror.track(order("o-5", "ETH/USD", "sell", 1.0), 3000.0)
+    assert mirror.spendable() == pytest.approx(100000.0 - 6000.0)
+    assert mirror.has_open("BTC/USD", "buy")
+    assert mirror.has_open("ETHUSD", "sell")
+
+    replay(mirror, stream, ("partial_fill", "o-4", "BTC/USD", "buy", 0.1, 60000.0, 0.04, 0.04))
+    # Cash moved by the fill; the reserve shrank by the same amount
+    assert mirror.cash == pytest.approx(100000.0 - 2400.0)
+    assert mirror.spendable() == pytest.approx(100000.0 - 6000.0)
+
+def test_sync_returns_false_when_an_update_lands_during_the_rest_read():
+    mirror, stream = make_mirror()
+
+    class RacingREST(SnapshotREST):
+        def list_positions(self):
+            mirror.apply(SimpleNamespace(event="fill", order=order("o-6", "BTC/USD", "buy", 0.1),
+                                         price=60000.0, qty=0.1, position_qty=0.1))
+            return super().list_positions()
+
+    mirror.api = RacingREST(100000.0)
+    assert mirror.sync() is False
+    # The newer stream state survives the stale snapshot
+    assert mirror.position("BTCUSD").qty == pytest.approx(0.1)
+    assert mirror.cash == pytest.approx(94000.0)
+
+def test_stream_up_only_while_connected():
+    class FailingStream(LocalTradeStream):
+        def run(self):
+            raise ValueError("auth failed")
+
+    mirror = BrokerMirror(SnapshotREST(100000.0), FailingStream, RecordingLogger(), reconcile_interval=3600)
+    mirror.start()
+    time.sleep(0.2)
+    assert not mirror.stream_up
+
+    stream = LocalTradeStream()
+    mirror = BrokerMirror(SnapshotREST(100000.0), lambda: stream, RecordingLogger(), reconcile_interval=3600)
+    mirror.start()
+    deadline = time.time() + 2
+    while not mirror.stream_up and time.time() < deadline:
+        time.sleep(0.01)
+    assert mirror.stream_up
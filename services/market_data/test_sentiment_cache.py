@@ -0,0 +1,29 @@
+import json
+import threading
+
+from sentiment_cache import SentimentCache
+
+
+def test_concurrent_gets_and_puts_keep_the_snapshot_readable(tmp_path):
+    path = tmp_path / "sentiment_cache.json"
+    cache = SentimentCache(path=str(path), max_size=64)
+
+    def worker(n):
+        for i in range(200):
+            headline = f"BTC headline {n}-{i % 80}"
+            if cache.get(headline) is None:
+                cache.put(headline, 0.1)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with open(path) as f:
+        snapshot = json.load(f)
+    assert len(snapshot) == 64
+    assert not list(tmp_path.glob("*.tmp"))
+    assert len(SentimentCache(path=str(path), max_size=64).entries) == 64
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 4 * 200
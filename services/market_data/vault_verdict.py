@@ -0,0 +1,20 @@
+# --- CURRENT VAULT VERDICT ---
+# One query for every reader of vault_clearance (the trading engine and the
+# dashboard), so both always show the same verdict. It selects the row for
+# the collection's *current* content fingerprint (the same expression
+# edgar_processor/clearance.py versions by), not the most recently computed
+# row: a vault rolled back to an earlier version serves that version's
+# verdict again. psycopg2 pyformat; pass {"name": <collection>}.
+COLLECTION = "institutional_research"
+
+CURRENT_VERDICT_SQL = """
+    WITH current AS (
+        SELECT md5(string_agg(md5(e.document), '' ORDER BY md5(e.document))) AS version
+        FROM langchain_pg_embedding e
+        JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+        WHERE c.name = %(name)s
+    )
+    SELECT v.is_clear, v.reasoning, v.collection_version, v.computed_at
+    FROM vault_clearance v JOIN current ON v.collection_version = current.version
+    WHERE v.collection_name = %(name)s;
+"""
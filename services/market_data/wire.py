@@ -0,0 +1,105 @@
+import json
+import struct
+from datetime import datetime, timedelta, timezone
+
+# --- MARKET_TRADES WIRE FORMAT ---
+# Every codec maps a canonical quote dict to bytes and back:
+#   {"symbol", "ts_ns", "bid", "ask", "bid_size", "ask_size", "type"}
+# decode() sniffs the first byte, so the consumer reads JSON and binary
+# messages side by side while producers roll over.
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+KINDS = ("quote", "trade")
+
+def to_epoch_ns(ts):
+    """datetime (naive = UTC) -> integer epoch nanoseconds, without float rounding."""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - EPOCH) // timedelta(microseconds=1) * 1000 + getattr(ts, "nanosecond", 0)
+
+def from_epoch_ns(ts_ns):
+    return EPOCH + timedelta(microseconds=ts_ns // 1000)
+
+
+class JsonCodec:
+    """The original v0 format: a JSON object with a stringified timestamp and bid as price."""
+    name = "json"
+
+    @staticmethod
+    def encode(quote):
+        return json.dumps({
+            "symbol": quote["symbol"],
+            "price": quote["bid"],
+            "time": str(from_epoch_ns(quote["ts_ns"])),
+            "type": quote.get("type", "quote"),
+        }).encode("utf-8")
+
+    @staticmethod
+    def decode(raw):
+        data = json.loads(raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else raw)
+        return {
+            "symbol": data["symbol"],
+            "ts_ns": to_epoch_ns(datetime.fromisoformat(data["time"])),
+            "bid": data["price"],
+            "ask": data.get("ask"),
+            "bid_size": data.get("bid_size"),
+            "ask_size": data.get("ask_size"),
+            "type": data.get("type", "quote"),
+        }
+
+
+class BinaryCodec:
+    """
+    v1 layout (little-endian, 43 bytes + symbol):
+    version:u8 | kind:u8 | ts_ns:i64 | bid:f64 | ask:f64 | bid_size:f64 | ask_size:f64 | sym_len:u8 | symbol
+    Missing floats travel as NaN.
+    """
+    name = "binary"
+    VERSION = 1
+    HEADER = struct.Struct("<BBqddddB")
+
+    @classmethod
+    def encode(cls, quote):
+        symbol = quote["symbol"].encode("utf-8")
+        nan = float("nan")
+        return cls.HEADER.pack(
+            cls.VERSION,
+            KINDS.index(quote.get("type", "quote")),
+            quote["ts_ns"],
+            quote["bid"],
+            nan if quote.get("ask") is None else quote["ask"],
+            nan if quote.get("bid_size") is None else quote["bid_size"],
+            nan if quote.get("ask_size") is None else quote["ask_size"],
+            len(symbol),
+        ) + symbol
+
+    @classmethod
+    def decode(cls, raw):
+        version, kind, ts_ns, bid, ask, bid_size, ask_size, sym_len = cls.HEADER.unpack_from(raw)
+        if version != cls.VERSION:
+            raise ValueError(f"Unsupported wire version {version}")
+        start = cls.HEADER.size
+        return {
+            "symbol": bytes(raw[start:start + sym_len]).decode("utf-8"),
+            "ts_ns": ts_ns,
+            "bid": bid,
+            "ask": None if ask != ask else ask,
+            "bid_size": None if bid_size != bid_size else bid_size,
+            "ask_size": None if ask_size != ask_size else ask_size,
+            "type": KINDS[kind],
+        }
+
+
+CODECS = {JsonCodec.name: JsonCodec, BinaryCodec.name: BinaryCodec}
+
+def get_codec(name):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown wire format '{name}'. Choose from: {', '.join(CODECS)}")
+
+def decode(raw):
+    """Decodes any supported version: JSON starts with '{', binary with its version byte."""
+    if raw[:1] == b"{":
+        return JsonCodec.decode(raw)
+    return BinaryCodec.decode(raw)